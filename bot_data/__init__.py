@@ -1,8 +1,9 @@
+import atexit
 import logging.handlers
 import os
 
-from .const import bot_version
-from .utils import ShutdownStatusFilter, UserChannelFormatter
+from .const import bot_version, log_json, log_queue_size
+from .utils import BoundedQueueHandler, JSONLinesFormatter, ShutdownStatusFilter, UserChannelFormatter
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +17,18 @@ handler = logging.handlers.TimedRotatingFileHandler(os.path.join(base, "bot.log"
 formatter = UserChannelFormatter()
 handler.setFormatter(formatter)
 handler.setLevel(log_level)
-logger.addHandler(handler)
+queue_handler = BoundedQueueHandler(log_queue_size)
+queue_handler.setLevel(log_level)
+logger.addHandler(queue_handler)
+handlers = [handler]
+if log_json:
+    json_handler = logging.handlers.TimedRotatingFileHandler(os.path.join(base, "bot.jsonl"), when="midnight", encoding="utf-8", utc=True)
+    json_handler.setFormatter(JSONLinesFormatter())
+    json_handler.setLevel(log_level)
+    handlers.append(json_handler)
+listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)  # Flushes the queue; also run by PokestarBot.run_reload before it replaces the process
 logger.info("Logging at level %s", level)
 
 aiosqlite_logger = logging.getLogger("aiosqlite")
@@ -12,13 +12,17 @@ from typing import Optional, Tuple, Union
 
 import aiohttp
 import aiosqlite
+import asyncpraw
 import discord.ext.commands
 import discord.ext.tasks
 import pytz
 
 from bot_data import bot_version
-from bot_data.creds import TOKEN, owner_id
-from bot_data.utils import BoundedList, Embed, ReloadingClient, StopCommand, break_into_groups, send_embeds, send_embeds_fields
+from bot_data.const import loop_lag_interval, loop_report_interval, loop_slow_callback, metrics_host, metrics_port, reaction_message_cache, \
+    reaction_route_limit
+from bot_data.creds import TOKEN, client_id, client_secret, owner_id, refresh_token, user_agent
+from bot_data.utils import BoundedList, CommandMetrics, Embed, LogContext, LoopMonitor, ReactionRouter, RedditInfoBatcher, ReloadingClient, \
+    StopCommand, WorkerPool, break_into_groups, log_context, send_embeds, send_embeds_fields
 
 logger = logging.getLogger(__name__)
 
@@ -51,11 +55,18 @@ class PokestarBot(discord.ext.commands.Bot):
         self.owner_id = owner_id
         self.obj_ids = {}
         self.session: Optional[aiohttp.ClientSession] = None
+        self._reddit: Optional[asyncpraw.Reddit] = None
+        self.reddit_info = RedditInfoBatcher(self)
+        self.reaction_router = ReactionRouter(self, limit=reaction_route_limit, cache_size=reaction_message_cache)
         self.conn: Optional[aiosqlite.Connection] = None
         self.channel_data = {}
         self.disabled_commands = {}
         self.channel_queue = asyncio.Queue()
         self.disabled_stat_channels = {}
+        self.worker_pool = WorkerPool()
+        self.loop_monitor = LoopMonitor(interval=loop_lag_interval, threshold=loop_slow_callback, report_interval=loop_report_interval)
+        self.metrics = CommandMetrics(histograms={"loop_lag_seconds": self.loop_monitor.lag})
+        self.metrics.install(self)
 
         for file in os.listdir(os.path.abspath(os.path.join(__file__, "..", "extensions"))):
             if not file.startswith("_"):
@@ -197,8 +208,20 @@ class PokestarBot(discord.ext.commands.Bot):
         if self.session is None:
             self.session = ReloadingClient(bot=self)
 
+    @property
+    def reddit(self) -> asyncpraw.Reddit:
+        """The Reddit client shared by every cog. It is created on first use, and asyncpraw refreshes the OAuth token from the refresh token
+        whenever it expires."""
+        if self._reddit is None:
+            self._reddit = asyncpraw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent, refresh_token=refresh_token,
+                                            requestor_kwargs={"session": self.session})
+        return self._reddit
+
     async def on_ready(self):
         logger.info("Bot ready.")
+        self.loop_monitor.start()
+        if metrics_port:
+            await self.metrics.serve(metrics_host, metrics_port)
         print("Bot ready. All future output is going to the log file.")
         await self.get_all_stats()
 
@@ -228,6 +251,16 @@ class PokestarBot(discord.ext.commands.Bot):
         else:
             raise discord.ext.commands.BotMissingPermissions(["send_messages"])
 
+    async def invoke(self, ctx: discord.ext.commands.Context):
+        log_context.set(LogContext.from_context(ctx))
+        await super().invoke(ctx)
+
+    async def _run_event(self, coro, event_name: str, *args, **kwargs):
+        # Every event handler, including each cog listener, runs in its own task copied from the gateway's empty context
+        if args and isinstance(args[0], discord.Message):
+            log_context.set(LogContext.from_message(args[0]))
+        await super()._run_event(coro, event_name, *args, **kwargs)
+
     async def ping_time(self, message: discord.Message):
         cur_time = datetime.datetime.utcnow()
         difference = cur_time - message.created_at
@@ -236,6 +269,7 @@ class PokestarBot(discord.ext.commands.Bot):
             self.ping_timedelta = difference
 
     async def on_message(self, message: discord.Message, _replay=False):
+        log_context.set(LogContext.from_message(message))
         if _replay:
             return await super().on_message(message)
         coros = [self.ping_time(message)]
@@ -431,9 +465,14 @@ class PokestarBot(discord.ext.commands.Bot):
 
     async def close(self, self_initiated=False):
         logger.critical("Started bot shutdown.")
+        if self._reddit is not None:
+            await self._reddit.close()
         if self.session is not None:
             await self.session.close()
+        await self.metrics.close()
         await self.conn.close()
+        self.worker_pool.shutdown()
+        self.loop_monitor.stop()
         await super().close()
         logger.debug("Self_initiated: %s", self_initiated)
         logger.info("Bot shutdown has finished, running final cleanup and exit.")
@@ -451,6 +490,8 @@ class PokestarBot(discord.ext.commands.Bot):
         if self.conn is None or not self.conn.is_alive():
             self.conn = await aiosqlite.connect(os.path.abspath(os.path.join(__file__, "..", "database.db")), isolation_level=None)
         await self.pre_create()
+        await self.reaction_router.pre_create()
+        await self.reaction_router.load()
         await self.get_channel_mappings()
         await self.get_disabled_commands()
         await self.get_disabled_channels()
@@ -571,6 +612,7 @@ class PokestarBot(discord.ext.commands.Bot):
     async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
         await self.on_delete(payload)
         await self.remove_stat(payload.guild_id, payload.channel_id, payload.message_id)
+        await self.reaction_router.forget(payload.message_id)
 
     async def on_delete(self, payload: discord.RawMessageDeleteEvent):
         channel = self.get_channel_data(payload.guild_id, "admin-log")
@@ -593,6 +635,10 @@ class PokestarBot(discord.ext.commands.Bot):
 
     async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
         await self.remove_stat(payload.guild_id, payload.channel_id, *payload.message_ids)
+        await self.reaction_router.forget(*payload.message_ids)
+
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        await self.reaction_router.dispatch(payload)
 
     @staticmethod
     def invalid_command_msg(command: Optional[str] = None):
@@ -1,16 +1,29 @@
 import enum
 import os
 import re
+from typing import NamedTuple, Tuple
 
 # Global
 bot_version = "3.2.1.1"
+log_queue_size = 10000  # Log records buffered for the writer thread before new records are dropped
+log_json = os.getenv("LOG_JSON", "0") == "1"  # Also write JSON-lines logs to bot.jsonl, which the log_query command searches
+reaction_route_limit = 10000  # Persisted routes kept across restarts, newest messages first
+reaction_message_cache = 500
+loop_lag_interval = 1
+loop_slow_callback = 0.1  # Seconds that a single callback may block the event loop for before it is reported
+loop_report_interval = 15 * 60
+metrics_host = "127.0.0.1"
+metrics_port = int(os.getenv("METRICS_PORT", "0"))  # The Prometheus endpoint is only served if a port is set
 
 # help.py
 help_file_dir = os.path.abspath(os.path.join(__file__, "..", "man"))
 help_file_template = "* `{}{}`: **{}**"
 
 # management.py
-log_line = re.compile(r"\((DEBUG|INFO|WARNING|ERROR|CRITICAL)\):")
+log_levels = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+log_entry = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d{3}] {([^:}]*)::[^}]*} {.*?} \((DEBUG|INFO|WARNING|ERROR|CRITICAL)\):")
+log_duration = re.compile(r"^(\d+)([smhd])$")
+log_snowflake = re.compile(r"^(?:<@!?)?(\d{15,21})>?$")
 channel_types = {"Generic Bot Channels": ["announcements", "bot-spam"],
                  "Misc. Bot Services"  : ["anime-and-manga-updates", "message-goals", "admin-log"],
                  "Reddit Services"     : ["modqueue", "unmoderated", "modlog"]}
@@ -19,8 +32,21 @@ channel_types = {"Generic Bot Channels": ["announcements", "bot-spam"],
 subreddit = re.compile("r/([A-Za-z0-9_]{1,21})")
 user = re.compile("(?:user|u)/([A-Za-z0-9_]{1,32})")
 blockquote = re.compile(r"^>([^\s>])", re.MULTILINE | re.IGNORECASE | re.UNICODE)
+reddit_cache_size = 500
+reddit_cache_ttl = 300
+reddit_comment_url = re.compile(r"reddit\.com/(?:(?:r|u|user)/[A-Za-z0-9_-]+/)?comments/[a-z0-9]+/[^/\s?#]*/([a-z0-9]+)")
+reddit_submission_url = re.compile(r"(?:reddit\.com/(?:(?:(?:r|u|user)/[A-Za-z0-9_-]+/)?comments|gallery)/|redd\.it/)([a-z0-9]+)")
+reddit_expand_concurrency = 5
+render_budget = 24000
 
 # redditmod.py
+mod_poll_rate = 60  # Reddit allows 60 OAuth requests a minute
+mod_poll_concurrency = 8
+mod_poll_page_sizes = (10, 100)  # Reddit returns at most 100 items per listing request
+removal_reason_ttl = 60 * 60  # Seconds; stale removal reasons are still shown while they are reloaded in the background
+modlog_seen_capacity = 100000
+modlog_seen_error_rate = 0.001
+modlog_seen_retention = 30 * 24 * 60 * 60  # Seconds; older actions are never fetched again, since the modlog cursor has moved past them
 submittable_actions = {"approvelink"    : "Approved Submission",
                        "approvecomment" : "Approved Comment",
                        "ignorereports"  : "Ignored Reports For Item",
@@ -48,6 +74,21 @@ user_actions = {"addcontributor"       : "Add Contributor",
                 "unmuteuser"           : "Unmute User",
                 "setpermissions"       : "Set User Permissions"}
 
+
+class ModlogTemplate(NamedTuple):
+    prefix: str
+    subject: Tuple[str, ...]  # Mod action attributes tried in order for the part of the title after the prefix
+    description: bool = True
+    link: bool = False
+
+
+modlog_templates = {**{action: ModlogTemplate(prefix, ("target_title", "target_fullname"), link=True) for action, prefix in
+                       submittable_actions.items()},
+                    **{action: ModlogTemplate(prefix, ("target_author", "target_fullname")) for action, prefix in user_actions.items()},
+                    "add_community_topics": ModlogTemplate("Add Community Topics", ("description",), description=False),
+                    "createrule"          : ModlogTemplate("Create Rule", ("details",), description=False)}
+modlog_fallback_template = ModlogTemplate("Other Action", ("action",))
+
 # role.py
 user_template_role = "* {}\n"
 role_template_role = "* **{}**: {} members\n"
@@ -232,6 +273,10 @@ guyamoe = re.compile(r"https://(?:www\.|)guya\.moe/read/manga/([^/\s]+)")
 mangadex = re.compile(r"https://(?:www\.|)mangadex\.org/(?:title|manga)/([0-9]+)")
 nyaasi = re.compile(r"https://nyaa.si/view/([0-9]+)")
 horriblesubs = re.compile(r"\[HorribleSubs\] ([\S ]+) - ([0-9]+) \[([0-9]+)p\].mkv")
+mention_limit = 50
+legacy_update_tables = {"Guyamoe" : ("GUYAMOE", "SLUG"),
+                        "MangaDex": ("MANGADEX", "CAST(MANGA_ID AS TEXT)"),
+                        "Nyaasi"  : ("NYAASI", "NAME")}
 
 
 # waifu.py
@@ -1,19 +1,20 @@
 import asyncio
+import datetime
 import logging
 import os
 import re
 import signal
 import sqlite3
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Iterable, Optional, TYPE_CHECKING, Union
 import itertools
 
 import aiosqlite
 import discord.ext.commands
 
-from ..const import channel_types, log_line
+from ..const import channel_types, log_duration, log_json, log_levels, log_snowflake
 from . import PokestarBotCog
 from .. import base
-from ..utils import Embed, break_into_groups, send_embeds, send_embeds_fields
+from ..utils import Embed, LogIndex, break_into_groups, send_embeds, send_embeds_fields, tail_log
 
 if TYPE_CHECKING:
     from ..bot import PokestarBot
@@ -22,10 +23,17 @@ logger = logging.getLogger(__name__)
 
 
 class Management(PokestarBotCog):
-    log_line = log_line
+    log_duration = log_duration
+    log_snowflake = log_snowflake
+    LOG_LEVELS = log_levels
+    LOG_JSON = log_json
 
     CHANNELS = channel_types
 
+    def __init__(self, bot: "PokestarBot"):
+        super().__init__(bot)
+        self.log_index = LogIndex(base)
+
     @discord.ext.commands.command(brief="Kill the bot")
     @discord.ext.commands.is_owner()
     @discord.ext.commands.dm_only()
@@ -39,27 +47,108 @@ class Management(PokestarBotCog):
     async def reload(self, _ctx: discord.ext.commands.Context):
         await self.bot.run_reload()
 
-    @discord.ext.commands.command(brief="Fetch bot logs.", usage="number")
+    @discord.ext.commands.command(brief="Fetch bot logs.", usage="[number] [level=level] [cog=cog] [since=time] [until=time]")
     @discord.ext.commands.is_owner()
     @discord.ext.commands.dm_only()
-    async def logs(self, ctx: discord.ext.commands.Context, number: int = 20):
-        with open(os.path.join(base, "bot.log"), "r", encoding="utf-8") as logfile:
-            lines = logfile.read().splitlines(False)
-        lines.reverse()
-        send_lines = []
-        counter = 0
-        for line in lines:
-            send_lines.append(line)
-            if self.log_line.search(line):
-                counter += 1
-            if counter == number:
-                break
-        send_lines.reverse()
-        groups = await break_into_groups("\n".join(send_lines), template="```\n")
+    async def logs(self, ctx: discord.ext.commands.Context, number: Optional[int] = 20, *filters: str):
+        try:
+            options = self.log_filters(filters)
+        except ValueError as exc:
+            return await ctx.send(embed=Embed(ctx, title="Invalid Filter", description=str(exc), color=discord.Color.red()))
+        entries = await self.bot.worker_pool.run("logs", tail_log, base, number, **options)
+        groups = await break_into_groups("\n".join(entry.text for entry in entries) or "No log entries match the filters.", template="```\n")
         embed = Embed(ctx, title="Log Lines")
         embed.add_field(name="Amount Requested", value=str(number), inline=False)
+        for name, value in options.items():
+            embed.add_field(name="Cog" if name == "module" else name.title(), value=str(value))
         await send_embeds(ctx, embed, groups)
 
+    @discord.ext.commands.command(brief="Query the structured logs.", usage="[number] [command=command] [user=user] [guild=guild] [level=level] "
+                                                                           "[since=time] [until=time]", aliases=["logquery"])
+    @discord.ext.commands.is_owner()
+    @discord.ext.commands.dm_only()
+    async def log_query(self, ctx: discord.ext.commands.Context, number: Optional[int] = 20, *filters: str):
+        if not self.LOG_JSON:
+            return await ctx.send(embed=Embed(ctx, title="Structured Logging Disabled", color=discord.Color.red(),
+                                              description="Set the `LOG_JSON` environment variable to `1` to write the structured logs."))
+        try:
+            options = self.log_filters(filters, ("command", "user", "guild", "level", "since", "until"))
+        except ValueError as exc:
+            return await ctx.send(embed=Embed(ctx, title="Invalid Filter", description=str(exc), color=discord.Color.red()))
+        entries = await self.bot.worker_pool.run("logs", self.log_index.query, number, **options)
+        lines = []
+        for entry in entries:
+            context = " ".join(f"{name}={entry[name]}" for name in ("user", "channel", "command") if entry.get(name) is not None)
+            lines.append(f"[{entry['timestamp']}] {{{entry['module']}::{entry['function']}}} ({entry['level']}){' ' + context if context else ''}: "
+                         f"{entry['message']}")
+        groups = await break_into_groups("\n".join(lines) or "No log entries match the filters.", template="```\n")
+        embed = Embed(ctx, title="Log Entries")
+        embed.add_field(name="Amount Requested", value=str(number), inline=False)
+        for name, value in options.items():
+            embed.add_field(name=name.replace("_id", "").title(), value=str(value))
+        await send_embeds(ctx, embed, groups)
+
+    def log_filters(self, filters: Iterable[str], names: Iterable[str] = ("level", "cog", "since", "until")) -> Dict[
+        str, Union[int, str, datetime.datetime]]:
+        options = {}
+        names = tuple(names)
+        for item in filters:
+            name, sep, value = item.partition("=")
+            name = name.lower()
+            if not sep or name not in names:
+                raise ValueError(f"`{item}` is not a filter. Use {', '.join(f'`{name}=`' for name in names[:-1])} or `{names[-1]}=`.")
+            if name == "level":
+                if value.upper() not in self.LOG_LEVELS:
+                    raise ValueError(f"`{value}` is not a log level. Use one of {', '.join(self.LOG_LEVELS)}.")
+                options["level"] = value.upper()
+            elif name == "cog":
+                options["module"] = value
+            elif name == "command":
+                options["command"] = value
+            elif name in ("user", "guild"):
+                if not (match := self.log_snowflake.match(value)):
+                    raise ValueError(f"`{value}` is not a {name} ID.")
+                options[name + "_id"] = int(match.group(1))
+            else:
+                options[name] = self.log_time(value)
+        return options
+
+    def log_time(self, value: str) -> datetime.datetime:
+        if match := self.log_duration.match(value):
+            amount, unit = match.groups()
+            return datetime.datetime.now() - datetime.timedelta(**{{"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}[unit]: int(amount)})
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"`{value}` is not a time. Use a duration such as `30m` or `2h`, or a date such as `2020-10-19T12:00`.") from None
+
+    @discord.ext.commands.command(brief="Get the event loop lag and the slowest callbacks.", usage="[number]", aliases=["looplag"])
+    @discord.ext.commands.is_owner()
+    async def loop_lag(self, ctx: discord.ext.commands.Context, number: int = 10):
+        monitor = self.bot.loop_monitor
+        embed = Embed(ctx, title="Event Loop Lag",
+                      description=f"Timer drift sampled every {monitor.interval:g} seconds, and the callbacks that blocked the event loop for at "
+                                  f"least {monitor.threshold * 1000:g} ms, by total time blocked.")
+        fields = [("Loop Lag", monitor.lag.render())]
+        fields.extend((name[:256], histogram.render()) for name, histogram in monitor.worst(monitor.slow, number))
+        if len(fields) == 1:
+            fields.append(("No Slow Callbacks", "No callback has blocked the event loop yet."))
+        await send_embeds_fields(ctx, embed, fields)
+
+    @discord.ext.commands.command(brief="Get command and Discord API metrics.", usage="[number]")
+    @discord.ext.commands.is_owner()
+    async def metrics(self, ctx: discord.ext.commands.Context, number: int = 10):
+        metrics = self.bot.metrics
+        embed = Embed(ctx, title="Metrics", description="The most used commands, and the most used Discord API routes, since the bot started.")
+        fields = [(f"{cog}: {command}", f"Errors: {stats.errors} ({stats.error_rate:.1%})\n" + stats.latency.render()) for (cog, command), stats in
+                  metrics.top(metrics.commands, number)]
+        if not fields:
+            fields.append(("No Commands", "No command has been run yet."))
+        routes = [f"`{method} {path}`: {stats.calls} calls, {stats.errors} errors, {stats.latency.mean * 1000:.0f} ms mean" for (method, path), stats
+                  in metrics.top(metrics.routes, number)]
+        fields.append(("Discord API Routes", "\n".join(routes) or "No requests have been made yet."))
+        await send_embeds_fields(ctx, embed, fields)
+
     @discord.ext.commands.command(brief="Resets the bot's permission overrides", enabled=False)
     @discord.ext.commands.has_guild_permissions(administrator=True)
     @discord.ext.commands.guild_only()
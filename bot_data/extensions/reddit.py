@@ -1,8 +1,9 @@
+import asyncio
 import datetime
 import inspect
 import logging
 import re
-from typing import Optional, TYPE_CHECKING
+from typing import Awaitable, Callable, Hashable, Iterator, List, Optional, TYPE_CHECKING, Tuple
 
 import anytree
 import asyncpraw.exceptions
@@ -12,9 +13,9 @@ import discord.ext.commands
 import discord.ext.tasks
 
 from . import PokestarBotCog
-from ..creds import client_id, client_secret, user_agent
-from ..const import subreddit, user, blockquote
-from ..utils import Embed, send_embeds_fields
+from ..const import blockquote, reddit_cache_size, reddit_cache_ttl, reddit_comment_url, reddit_expand_concurrency, reddit_submission_url, \
+    render_budget, subreddit, user
+from ..utils import CommentAncestry, Embed, TTLCache, send_embeds_fields
 from ..utils.nodes import CommentNode, SubmissionNode
 
 if TYPE_CHECKING:
@@ -27,6 +28,10 @@ class Reddit(PokestarBotCog):
     SUBREDDIT = subreddit
     USER = user
     BLOCKQUOTE = blockquote
+    COMMENT_URL = reddit_comment_url
+    SUBMISSION_URL = reddit_submission_url
+    EXPAND_CONCURRENCY = reddit_expand_concurrency
+    RENDER_BUDGET = render_budget
 
     @property
     def conn(self):
@@ -34,19 +39,73 @@ class Reddit(PokestarBotCog):
 
     @property
     def reddit(self):
-        return asyncpraw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent,
-                                requestor_kwargs={"session": self.bot.session})
+        return self.bot.reddit
+
+    def __init__(self, bot: "PokestarBot"):
+        super().__init__(bot)
+        self.objects = TTLCache(bound=reddit_cache_size, ttl=reddit_cache_ttl)
+        self.embeds = TTLCache(bound=reddit_cache_size, ttl=reddit_cache_ttl)
+
+    async def fetch_submission(self, sub_id: str) -> Optional[asyncpraw.models.Submission]:
+        key = "t3_" + sub_id
+        if (sub := self.objects.get(key)) is None:
+            if (sub := await self.bot.reddit_info.resolve(key)) is not None:
+                self.objects[key] = sub
+        return sub
+
+    async def fetch_comment(self, comment: asyncpraw.models.Comment) -> Optional[asyncpraw.models.Comment]:
+        key = "t1_" + comment.id
+        if (cached := self.objects.get(key)) is None:
+            if (cached := await self.bot.reddit_info.resolve(key)) is None:
+                return None
+            cached.submission = await self.fetch_submission(cached.link_id[3:]) or cached.submission
+            self.objects[key] = cached
+        return cached
+
+    async def fetch_subreddit(self, name: str) -> asyncpraw.models.Subreddit:
+        key = "subreddit:" + name.lower()
+        if (subreddit := self.objects.get(key)) is None:
+            subreddit = self.objects[key] = await self.reddit.subreddit(name, fetch=True)
+        return subreddit
+
+    async def fetch_redditor(self, name: str) -> asyncpraw.models.Redditor:
+        key = "redditor:" + name.lower()
+        if (redditor := self.objects.get(key)) is None:
+            redditor = self.objects[key] = await self.reddit.redditor(name, fetch=True)
+        return redditor
+
+    def get_embed(self, ctx: discord.ext.commands.Context, key: Hashable) -> Optional[discord.Embed]:
+        if (data := self.embeds.get(key)) is None:
+            return None
+        embed = discord.Embed.from_dict(data)
+        embed.set_author(name=ctx.author, icon_url=ctx.author.avatar_url_as(size=4096))
+        return embed
+
+    def store_embed(self, key: Hashable, embed: discord.Embed):
+        data = embed.to_dict()
+        data.pop("author", None)
+        self.embeds[key] = data
 
     @staticmethod
-    async def render(node: CommentNode, maxlevel: Optional[int] = None, num: Optional[int] = None):
-        items = []
-        for i, data in enumerate(anytree.RenderTree(node, maxlevel=maxlevel), start=1):
+    def render_lines(node: CommentNode, maxlevel: Optional[int] = None, num: Optional[int] = None) -> Iterator[str]:
+        for i, (pre, fill, node_obj) in enumerate(anytree.RenderTree(node, maxlevel=maxlevel), start=1):
             if num is not None and i > num:
+                return
+            lines = node_obj.lines
+            yield pre + lines[0]
+            for line in lines[1:]:
+                yield fill + line
+
+    async def render(self, node: CommentNode, maxlevel: Optional[int] = None, num: Optional[int] = None):
+        """Render the tree, walking only as far as needed to fill ``RENDER_BUDGET`` characters or ``num`` nodes."""
+        items = []
+        length = 0
+        for line in self.render_lines(node, maxlevel=maxlevel, num=num):
+            length += len(line) + 1
+            if length > self.RENDER_BUDGET:
+                items.append("...")
                 break
-            pre, fill, node_obj = data
-            items.append("{}{}".format(pre, node_obj.lines[0]))
-            for line in node_obj.lines[1:]:
-                items.append("{}{}".format(fill, line))
+            items.append(line)
         return "\n".join(items)
 
     @discord.ext.commands.group(brief="Get information on a submission.", usage="link_or_id [link_or_id] [...]", invoke_without_command=True)
@@ -54,6 +113,7 @@ class Reddit(PokestarBotCog):
         await self.bot.load_session()
         if len(links) == 0 and not _called_from_on_message:
             raise discord.ext.commands.MissingRequiredArgument(inspect.Parameter("submission", inspect.Parameter.POSITIONAL_ONLY))
+        nsfw = isinstance(ctx.channel, discord.TextChannel) and ctx.channel.is_nsfw()  # DM channels have no NSFW flag
         for link in links:
             try:
                 if "/" in link:
@@ -67,9 +127,11 @@ class Reddit(PokestarBotCog):
                 embed.add_field(name="ID or URL", value=link)
                 return await ctx.send(embed=embed)
             else:
-                try:
-                    sub = await self.reddit.submission(id=sub.id)
-                except asyncprawcore.exceptions.NotFound:
+                key = ("t3_" + sub.id, nsfw)
+                if embed := self.get_embed(ctx, key):
+                    await ctx.send(embed=embed)
+                    continue
+                if (fetched := await self.fetch_submission(sub.id)) is None:
                     if _called_from_on_message:
                         return
                     embed = Embed(ctx, title="Does Not Exist", description="The given submission ID does not exist", color=discord.Color.red())
@@ -77,13 +139,14 @@ class Reddit(PokestarBotCog):
                     embed.add_field(name="Provided Link", value=link)
                     return await ctx.send(embed=embed)
                 else:
+                    sub = fetched
                     embed = Embed(ctx,
                                   timestamp=datetime.datetime.utcfromtimestamp(sub.created_utc), url="https://www.reddit.com" + sub.permalink)
                     description = self.BLOCKQUOTE.sub(r"> \1", sub.selftext or sub.url)
                     if len(description) > 2048:
                         description = description[:2045] + "..."
                     embed.description = description
-                    if not sub.over_18 or (sub.over_18 and ctx.channel.is_nsfw()):
+                    if not sub.over_18 or (sub.over_18 and nsfw):
                         embed.title = sub.title
                         image_url = sub.url
                         if not (not image_url.endswith(".jpg") and not image_url.endswith(".png") and not image_url.endswith(".jpeg")):
@@ -103,6 +166,7 @@ class Reddit(PokestarBotCog):
                     embed.add_field(name="Awards", value=str(sub.total_awards_received))
                     embed.add_field(name="Comments", value=str(sub.num_comments))
                     embed.add_field(name="Upvote Ratio", value=str(int(sub.upvote_ratio * 100)) + "%")
+                    self.store_embed(key, embed)
                     await ctx.send(embed=embed)
 
     @submission.command(brief="Get the full body of a Submission, without all of the other information.", usage="link [link]")
@@ -121,14 +185,13 @@ class Reddit(PokestarBotCog):
                 embed.add_field(name="ID or URL", value=link)
                 return await ctx.send(embed=embed)
             else:
-                try:
-                    sub = await self.reddit.submission(id=sub.id)
-                except asyncprawcore.exceptions.NotFound:
+                if (fetched := await self.fetch_submission(sub.id)) is None:
                     embed = Embed(ctx, title="Does Not Exist", description="The given submission ID does not exist", color=discord.Color.red())
                     embed.add_field(name="Submission ID", value=str(sub.id))
                     embed.add_field(name="Provided Link", value=link)
                     return await ctx.send(embed=embed)
                 else:
+                    sub = fetched
                     embed = Embed(ctx,
                                   timestamp=datetime.datetime.utcfromtimestamp(sub.created_utc), url="https://www.reddit.com" + sub.permalink)
                     description = self.BLOCKQUOTE.sub(r"> \1", sub.selftext or sub.url)
@@ -139,6 +202,7 @@ class Reddit(PokestarBotCog):
         await self.bot.load_session()
         if len(links) == 0 and not _called_from_on_message:
             raise discord.ext.commands.MissingRequiredArgument(inspect.Parameter("comment", inspect.Parameter.POSITIONAL_ONLY))
+        nsfw = isinstance(ctx.channel, discord.TextChannel) and ctx.channel.is_nsfw()
         for link in links:
             try:
                 if "/" in link:
@@ -152,9 +216,11 @@ class Reddit(PokestarBotCog):
                 embed.add_field(name="ID or URL", value=link)
                 return await ctx.send(embed=embed)
             else:
-                try:
-                    await comment.refresh()
-                except asyncprawcore.exceptions.NotFound:
+                key = ("t1_" + comment.id, nsfw)
+                if embed := self.get_embed(ctx, key):
+                    await ctx.send(embed=embed)
+                    continue
+                if (fetched := await self.fetch_comment(comment)) is None:
                     if _called_from_on_message:
                         return
                     embed = Embed(ctx, title="Does Not Exist", description="The given comment ID does not exist", color=discord.Color.red())
@@ -162,7 +228,7 @@ class Reddit(PokestarBotCog):
                     embed.add_field(name="Provided Link", value=link)
                     return await ctx.send(embed=embed)
                 else:
-                    await comment.submission.load()
+                    comment = fetched
                     embed = Embed(ctx,
                                   timestamp=datetime.datetime.utcfromtimestamp(comment.created_utc),
                                   url="https://www.reddit.com" + comment.permalink)
@@ -171,7 +237,7 @@ class Reddit(PokestarBotCog):
                         description = description[:2045] + "..."
                     sub = comment.submission
                     embed.description = description
-                    if not sub.over_18 or (sub.over_18 and ctx.channel.is_nsfw()):
+                    if not sub.over_18 or (sub.over_18 and nsfw):
                         embed.title = f"Comment in *{comment.submission.title}*"
                         thumb_url = sub.thumbnail
                         if not (not thumb_url.endswith(".jpg") and not thumb_url.endswith(".png") and not thumb_url.endswith(".jpeg")):
@@ -187,7 +253,7 @@ class Reddit(PokestarBotCog):
                     embed.add_field(name="Score", value=comment.score)
                     embed.add_field(name="Score Hidden", value=str(comment.score_hidden))
                     embed.add_field(name="Awards", value=str(comment.total_awards_received))
-                    embed.add_field(name="Replies (Estimated)", value=str(len(comment.replies)))
+                    self.store_embed(key, embed)
                     await ctx.send(embed=embed)
 
     @comment.command(name="body", brief="Get the full body of a Submission, without all of the other information.", usage="link [link]")
@@ -206,15 +272,13 @@ class Reddit(PokestarBotCog):
                 embed.add_field(name="ID or URL", value=link)
                 return await ctx.send(embed=embed)
             else:
-                try:
-                    await comment.refresh()
-                except asyncprawcore.exceptions.NotFound:
+                if (fetched := await self.fetch_comment(comment)) is None:
                     embed = Embed(ctx, title="Does Not Exist", description="The given comment ID does not exist", color=discord.Color.red())
                     embed.add_field(name="Comment ID", value=str(comment.id))
                     embed.add_field(name="Provided Link", value=link)
                     return await ctx.send(embed=embed)
                 else:
-                    await comment.submission.load()
+                    comment = fetched
                     embed = Embed(ctx,
                                   timestamp=datetime.datetime.utcfromtimestamp(comment.created_utc),
                                   url="https://www.reddit.com" + comment.permalink)
@@ -226,11 +290,12 @@ class Reddit(PokestarBotCog):
         await self.bot.load_session()
         if len(links) == 0 and not _called_from_on_message:
             raise discord.ext.commands.MissingRequiredArgument(inspect.Parameter("subreddit", inspect.Parameter.POSITIONAL_ONLY))
+        nsfw = isinstance(ctx.channel, discord.TextChannel) and ctx.channel.is_nsfw()
         for link in links:
             if "/" in link or link.startswith("r/"):
                 if match := self.SUBREDDIT.search(link):
                     try:
-                        subreddit = await self.reddit.subreddit(match.group(1), fetch=True)
+                        subreddit = await self.fetch_subreddit(match.group(1))
                     except asyncprawcore.exceptions.NotFound:
                         if _called_from_on_message:
                             return
@@ -246,13 +311,17 @@ class Reddit(PokestarBotCog):
                     return await ctx.send(embed=embed)
             else:
                 try:
-                    subreddit = await self.reddit.subreddit(link, fetch=True)
+                    subreddit = await self.fetch_subreddit(link)
                 except asyncprawcore.exceptions.NotFound:
                     if _called_from_on_message:
                         return
                     embed = Embed(ctx, title="Does Not Exist", description="The given subreddit does not exist", color=discord.Color.red())
                     embed.add_field(name="Provided Link", value=link)
                     return await ctx.send(embed=embed)
+            key = (subreddit.fullname, nsfw, _called_from_on_message)
+            if embed := self.get_embed(ctx, key):
+                await ctx.send(embed=embed)
+                continue
             embed = Embed(ctx, url="https://www.reddit.com" + subreddit.url,
                           timestamp=datetime.datetime.utcfromtimestamp(subreddit.created_utc))
             if hex_code := subreddit.primary_color[1:]:
@@ -262,7 +331,7 @@ class Reddit(PokestarBotCog):
                 description = description[:2045] + "..."
             if not _called_from_on_message:
                 embed.description = description
-            if not subreddit.over18 or (subreddit.over18 and ctx.channel.is_nsfw()):
+            if not subreddit.over18 or (subreddit.over18 and nsfw):
                 embed.title = subreddit.title
                 embed.set_thumbnail(url=subreddit.community_icon or discord.Embed.Empty)
                 embed.set_image(url=subreddit.banner_background_image or discord.Embed.Empty)
@@ -271,6 +340,7 @@ class Reddit(PokestarBotCog):
             embed.title += " [NSFW]" if subreddit.over18 else ""
             embed.add_field(name="Subscribers", value=str(subreddit.subscribers))
             embed.add_field(name="People Currently On Subreddit", value=str(subreddit.accounts_active))
+            self.store_embed(key, embed)
             await ctx.send(embed=embed)
 
     @discord.ext.commands.command(brief="Get the information on a user", usage="user [user] [...]")
@@ -278,11 +348,12 @@ class Reddit(PokestarBotCog):
         await self.bot.load_session()
         if len(links) == 0 and not _called_from_on_message:
             raise discord.ext.commands.MissingRequiredArgument(inspect.Parameter("user", inspect.Parameter.POSITIONAL_ONLY))
+        nsfw = isinstance(ctx.channel, discord.TextChannel) and ctx.channel.is_nsfw()
         for link in links:
             if "/" in link or link.startswith("u/"):
                 if match := self.USER.search(link):
                     try:
-                        redditor = await self.reddit.redditor(match.group(1), fetch=True)
+                        redditor = await self.fetch_redditor(match.group(1))
                     except asyncprawcore.exceptions.NotFound:
                         if _called_from_on_message:
                             return
@@ -298,20 +369,24 @@ class Reddit(PokestarBotCog):
                     return await ctx.send(embed=embed)
             else:
                 try:
-                    redditor = await self.reddit.redditor(link, fetch=True)
+                    redditor = await self.fetch_redditor(link)
                 except asyncprawcore.exceptions.NotFound:
                     if _called_from_on_message:
                         return
                     embed = Embed(ctx, title="Does Not Exist", description="The given subreddit does not exist", color=discord.Color.red())
                     embed.add_field(name="Provided Link", value=link)
                     return await ctx.send(embed=embed)
+            key = ("redditor:" + redditor.name.lower(), nsfw)
+            if embed := self.get_embed(ctx, key):
+                await ctx.send(embed=embed)
+                continue
             subreddit = redditor.subreddit
             if isinstance(subreddit, dict):
                 subreddit = asyncpraw.models.Subreddit(self.reddit, _data=subreddit)
             embed = Embed(ctx, title=(getattr(redditor, 'name', '[deleted]') or '[deleted]') + (" [NSFW]" if subreddit.over_18 else ""),
                           url="https://www.reddit.com/user/" + getattr(redditor, 'name', '[deleted]') or '[deleted]',
                           timestamp=datetime.datetime.utcfromtimestamp(redditor.created_utc))
-            if not subreddit.over_18 or (subreddit.over_18 and ctx.channel.is_nsfw()):
+            if not subreddit.over_18 or (subreddit.over_18 and nsfw):
                 embed.set_thumbnail(url=subreddit.icon_img or discord.Embed.Empty)
                 embed.set_image(url=subreddit.banner_img or discord.Embed.Empty)
             embed.add_field(name="Total Karma", value=str(redditor.total_karma))
@@ -319,6 +394,7 @@ class Reddit(PokestarBotCog):
             embed.add_field(name="Comment Karma", value=str(redditor.comment_karma))
             embed.add_field(name="Awarder Karma", value=str(redditor.awarder_karma))
             embed.add_field(name="Awardee Karma", value=str(redditor.awardee_karma))
+            self.store_embed(key, embed)
             await ctx.send(embed=embed)
 
     @discord.ext.commands.group(brief="Get a comment thread", usage="comment", invoke_without_command=True)
@@ -338,8 +414,8 @@ class Reddit(PokestarBotCog):
                 return await ctx.send(embed=embed)
             else:
                 try:
-                    parent = await comment.parent()
-                    await comment.refresh()
+                    ancestry = await self.fetch_ancestry(comment, link)
+                    comment = await ancestry.get(comment.fullname)
                 except (asyncprawcore.exceptions.NotFound, asyncpraw.exceptions.ClientException):
                     embed = Embed(ctx, title="Does Not Exist", description="The given comment ID does not exist", color=discord.Color.red())
                     embed.add_field(name="Comment ID", value=str(comment.id))
@@ -347,8 +423,8 @@ class Reddit(PokestarBotCog):
                     return await ctx.send(embed=embed)
                 else:
                     cn = CommentNode(comment, full=True)
-                    if isinstance(parent, asyncpraw.models.Submission):
-                        sn = SubmissionNode(parent)
+                    if comment.parent_id == ancestry.submission.fullname:
+                        sn = SubmissionNode(ancestry.submission)
                         sn.children = [cn]
                         text = await self.render(sn, num=16)
                     else:
@@ -376,26 +452,18 @@ class Reddit(PokestarBotCog):
                 return await ctx.send(embed=embed)
             else:
                 try:
-                    parent = await comment.parent()
+                    ancestry = await self.fetch_ancestry(comment, link)
+                    chain = await ancestry.chain(comment.id)
                 except (asyncprawcore.exceptions.NotFound, asyncpraw.exceptions.ClientException):
                     embed = Embed(ctx, title="Does Not Exist", description="The given comment ID does not exist", color=discord.Color.red())
                     embed.add_field(name="Comment ID", value=str(comment.id))
                     embed.add_field(name="Provided Link", value=link)
                     return await ctx.send(embed=embed)
                 else:
-                    cn = CommentNode(comment, full=True)
-                    cn.children = []
-                    while not isinstance(parent, asyncpraw.models.Submission):
-                        child = [cn]
-                        cn = CommentNode(parent, full=True)
-                        child[0].parent = cn
-                        cn.children = child
-                        parent = await parent.parent()
-                    sn = SubmissionNode(parent)
-                    sn.children = [cn]
-                    cn.parent = sn
+                    sn = SubmissionNode(ancestry.submission)
+                    self.link_chain(sn, chain)
                     text = await self.render(sn)
-                    embed = Embed(ctx, title="Comment Chain", url="https://www.reddit.com" + comment.permalink)
+                    embed = Embed(ctx, title="Comment Chain", url="https://www.reddit.com" + chain[-1].permalink)
                     if len(text) < 2048:
                         embed.description = text
                         return await ctx.send(embed=embed)
@@ -425,36 +493,54 @@ class Reddit(PokestarBotCog):
                 return await ctx.send(embed=embed)
             else:
                 try:
-                    await top_comment.refresh()
+                    ancestry = await self.fetch_ancestry(bottom_comment, bottom)
+                    await ancestry.get(bottom_comment.fullname)
                 except (asyncprawcore.exceptions.NotFound, asyncpraw.exceptions.ClientException):
                     embed = Embed(ctx, title="Does Not Exist", description="The given comment ID does not exist", color=discord.Color.red())
-                    embed.add_field(name="Comment ID", value=str(top_comment.id))
-                    embed.add_field(name="Provided Link", value=top)
+                    embed.add_field(name="Comment ID", value=str(bottom_comment.id))
+                    embed.add_field(name="Provided Link", value=bottom)
                     return await ctx.send(embed=embed)
                 else:
                     try:
-                        parent = await bottom_comment.parent()
+                        chain = await ancestry.chain(bottom_comment.id, top_id=top_comment.id)
                     except (asyncprawcore.exceptions.NotFound, asyncpraw.exceptions.ClientException):
-                        embed = Embed(ctx, title="Does Not Exist", description="The given comment ID does not exist", color=discord.Color.red())
-                        embed.add_field(name="Comment ID", value=str(bottom_comment.id))
-                        embed.add_field(name="Provided Link", value=bottom)
+                        embed = Embed(ctx, title="Does Not Exist", description="The given top comment is not above the bottom comment.",
+                                      color=discord.Color.red())
+                        embed.add_field(name="Comment ID", value=str(top_comment.id))
+                        embed.add_field(name="Provided Link", value=top)
                         return await ctx.send(embed=embed)
                     else:
-                        cn = CommentNode(bottom_comment, full=True)
-                        cn.children = []
-                        while not parent == top_comment:
-                            child = [cn]
-                            cn = CommentNode(parent, full=True)
-                            child[0].parent = cn
-                            cn.children = child
-                            parent = await parent.parent()
+                        cn = CommentNode(chain[0], full=True)
+                        self.link_chain(cn, chain[1:])
                         text = await self.render(cn)
-                        embed = Embed(ctx, title="Comment Chain", url="https://www.reddit.com" + top_comment.permalink)
+                        embed = Embed(ctx, title="Comment Chain", url="https://www.reddit.com" + chain[0].permalink)
                         if len(text) < 2048:
                             embed.description = text
                             return await ctx.send(embed=embed)
                         await send_embeds_fields(ctx, embed, [("\u200b", text)])
 
+    async def fetch_ancestry(self, comment: asyncpraw.models.Comment, link: str) -> CommentAncestry:
+        """Return a CommentAncestry for the submission the comment belongs to, with the comment and its ancestors already loaded. The
+        submission is taken from the link if it is a URL; only a bare comment ID needs an info lookup to find it."""
+        if match := self.SUBMISSION_URL.search(link):
+            submission_id = match.group(1)
+        elif (info := await self.bot.reddit_info.resolve(comment.fullname)) is not None:
+            submission_id = info.link_id.partition("_")[2]
+        else:
+            raise asyncpraw.exceptions.ClientException(f"Comment {comment.fullname} does not exist.")
+        ancestry = CommentAncestry(self.reddit, submission_id)
+        await ancestry.load(comment.id)
+        return ancestry
+
+    @staticmethod
+    def link_chain(node: CommentNode, chain: List[asyncpraw.models.Comment]):
+        """Hang each comment of the chain below the previous one, starting at the given node. The last comment gets no replies."""
+        for comment in chain:
+            child = CommentNode(comment, full=True)
+            node.children = [child]
+            node = child
+        node.children = []
+
     @discord.ext.commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         content = message.content
@@ -479,43 +565,35 @@ class Reddit(PokestarBotCog):
                     users.append(word)
             if urls:
                 logger.debug("Found URLs: %s", urls)
-            for url in urls:
-                try:
-                    await self.comment(context, url, _called_from_on_message=True)
-                except asyncpraw.exceptions.InvalidURL:
-                    try:
-                        await self.submission(context, url, _called_from_on_message=True)
-                    except asyncpraw.exceptions.InvalidURL:
-                        if "/user" in url:
-                            try:
-                                await self.user(context, url, _called_from_on_message=True)
-                            except Exception:
-                                logger.warning("Failed on url %s", url, exc_info=True)
-                                continue
-                        else:
-                            try:
-                                await self.subreddit(context, url, _called_from_on_message=True)
-                            except Exception:
-                                logger.warning("Failed on url %s", url, exc_info=True)
-                                continue
-                    except Exception:
-                        logger.warning("Failed on url %s", url, exc_info=True)
-                        continue
-                except Exception:
-                    logger.warning("Failed on url %s", url, exc_info=True)
-                    continue
             if subreddits:
                 logger.debug("Found Subreddits: %s", subreddits)
-                try:
-                    await self.subreddit(context, *subreddits, _called_from_on_message=True)
-                except Exception:
-                    logger.warning("Failed on subreddits %s", subreddits, exc_info=True)
             if users:
                 logger.debug("Found Users: %s", users)
-                try:
-                    await self.user(context, *users, _called_from_on_message=True)
-                except Exception:
-                    logger.warning("Failed on users %s", users, exc_info=True)
+            targets = [target for url in urls if (target := self.classify_url(url))]
+            targets.extend((self.subreddit, name) for name in subreddits)
+            targets.extend((self.user, name) for name in users)
+            semaphore = asyncio.Semaphore(self.EXPAND_CONCURRENCY)
+
+            async def expand(command: Callable[..., Awaitable], link: str):
+                async with semaphore:
+                    try:
+                        await command(context, link, _called_from_on_message=True)
+                    except Exception:
+                        logger.warning("Failed on %s", link, exc_info=True)
+
+            await asyncio.gather(*[expand(command, link) for command, link in targets])
+
+    def classify_url(self, url: str) -> Optional[Tuple[Callable[..., Awaitable], str]]:
+        """Decide from the shape of a reddit URL which command expands it, so that only a single request is made per URL."""
+        if match := self.COMMENT_URL.search(url):
+            return self.comment, match.group(1)
+        elif match := self.SUBMISSION_URL.search(url):
+            return self.submission, match.group(1)
+        elif "/user/" in url or "/u/" in url:
+            return self.user, url
+        elif self.SUBREDDIT.search(url):
+            return self.subreddit, url
+        return None
 
 
 def setup(bot: "PokestarBot"):
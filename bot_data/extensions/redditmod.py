@@ -1,8 +1,12 @@
 import asyncio
+import copy
 import datetime
+import functools
+import itertools
 import logging
 import sqlite3
-from typing import List, TYPE_CHECKING, Union, Optional
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, TYPE_CHECKING, Tuple, Union
 
 import asyncpraw.exceptions
 import asyncpraw.models
@@ -11,10 +15,11 @@ import discord.ext.commands
 import discord.ext.tasks
 
 from . import PokestarBotCog
-from ..const import bot_version, submittable_actions, user_actions
+from ..const import bot_version, mod_poll_concurrency, mod_poll_page_sizes, mod_poll_rate, modlog_fallback_template, modlog_seen_capacity, \
+    modlog_seen_error_rate, modlog_seen_retention, modlog_templates, removal_reason_ttl
 from ..converters import AllConverter
-from ..creds import client_id, client_secret, refresh_token, user_agent
-from ..utils import BoundedDict, CustomContext, Embed, RedditItemStash, aenumerate, send_embeds_fields
+from ..utils import BloomFilter, CustomContext, Delivery, DeliveryQueue, Embed, RateBudget, RedditItemStash, RefreshingCache, \
+    send_embeds_fields
 
 if TYPE_CHECKING:
     from ..bot import PokestarBot
@@ -23,8 +28,11 @@ logger = logging.getLogger(__name__)
 
 
 class RedditMod(PokestarBotCog):
-    SUBMITTABLE_ACTIONS = submittable_actions
-    USER_ACTIONS = user_actions
+    MODLOG_TEMPLATES = modlog_templates
+    MODLOG_FALLBACK_TEMPLATE = modlog_fallback_template
+    PAGE_SIZES = mod_poll_page_sizes
+    CURSOR_FEEDS = ("log", "unmoderated")  # Feeds ordered by creation time; the modqueue is ordered by report time instead
+    SEEN_RETENTION = modlog_seen_retention
 
     @property
     def conn(self):
@@ -32,17 +40,21 @@ class RedditMod(PokestarBotCog):
 
     @property
     def reddit(self):
-        return asyncpraw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent, refresh_token=refresh_token,
-                                requestor_kwargs={"session": self.bot.session})
+        return self.bot.reddit
 
     def __init__(self, bot: "PokestarBot"):
         super().__init__(bot)
-        self.modqueue = RedditItemStash("modqueue", itemtype=BoundedDict)
-        self.modlog = RedditItemStash("modlog", bound=20)
+        self.modqueue_seen: Optional[Dict[str, int]] = None  # Fullname -> number of reports when it was last delivered
+        self.seen_actions: Optional[BloomFilter] = None
+        self.removal_reasons = RefreshingCache(self.load_removal_reasons, ttl=removal_reason_ttl)
         self.unmoderated = RedditItemStash("unmoderated")
         self.modqueue_started = []
         self.modlog_started = []
         self.unmoderated_started = []
+        self.poll_budget = RateBudget(rate=mod_poll_rate, per=60, concurrency=mod_poll_concurrency)
+        self.page_sizes: Dict[Tuple[str, str], int] = {}
+        self.delivery_queues: Dict[int, DeliveryQueue] = {}
+        self.bot.reaction_router.add_handler(self.name, self.on_reaction)
         self.bot.add_check_recursive(self.modqueue_command, self.bot.has_channel("modqueue"), discord.ext.commands.guild_only())
         self.bot.add_check_recursive(self.modlog_command, self.bot.has_channel("modlog"), discord.ext.commands.guild_only())
         self.bot.add_check_recursive(self.unmoderated_command, self.bot.has_channel("unmoderated"), discord.ext.commands.guild_only())
@@ -54,6 +66,9 @@ class RedditMod(PokestarBotCog):
         self.modqueue_task.stop()
         self.modlog_task.stop()
         self.unmoderated_task.stop()
+        for queue in self.delivery_queues.values():
+            queue.stop()
+        self.bot.reaction_router.remove_handler(self.name)
 
     async def pre_create(self):
         await self.bot.wait_until_ready()
@@ -69,22 +84,121 @@ class RedditMod(PokestarBotCog):
                 """CREATE TABLE IF NOT EXISTS UNMODERATED(ID INTEGER PRIMARY KEY AUTOINCREMENT, SUBREDDIT_NAME TEXT NOT NULL, GUILD_ID BIGINT NOT 
                 NULL, UNIQUE(SUBREDDIT_NAME, GUILD_ID))"""):
             pass
+        async with self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS MOD_CURSORS(ID INTEGER PRIMARY KEY AUTOINCREMENT, SUBREDDIT_NAME TEXT NOT NULL, FEED TEXT NOT NULL,
+                ITEM_KEY TEXT NOT NULL, CREATED_UTC REAL NOT NULL, UNIQUE(SUBREDDIT_NAME, FEED))"""):
+            pass
+        async with self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS MODLOG_SEEN(ACTION_ID TEXT PRIMARY KEY, SUBREDDIT_NAME TEXT NOT NULL, CREATED_UTC REAL NOT NULL)
+                WITHOUT ROWID"""):
+            pass
+        async with self.conn.execute("""CREATE INDEX IF NOT EXISTS MODLOG_SEEN_CREATED ON MODLOG_SEEN(CREATED_UTC)"""):
+            pass
+        async with self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS MODQUEUE_SEEN(FULLNAME TEXT PRIMARY KEY, SUBREDDIT_NAME TEXT NOT NULL, NUM_REPORTS INTEGER NOT NULL)
+                WITHOUT ROWID"""):
+            pass
+        async with self.conn.execute("""CREATE INDEX IF NOT EXISTS MODQUEUE_SEEN_SUBREDDIT ON MODQUEUE_SEEN(SUBREDDIT_NAME)"""):
+            pass
 
-    @discord.ext.tasks.loop(minutes=2)
-    async def modqueue_task(self):
+    async def poll_feed(self, table: str, feed: str, handler: Callable[..., Awaitable]):
+        """Poll one mod feed of every subreddit in the table concurrently. Listing requests of all feeds share the poll budget, so that a slow
+        subreddit does not hold up the others and the bot stays within Reddit's rate limit."""
         await self.pre_create()
         await self.bot.load_session()
-        async with self.conn.execute("""SELECT DISTINCT SUBREDDIT_NAME FROM MODQUEUE""") as cursor:
+        async with self.conn.execute(f"""SELECT SUBREDDIT_NAME, GUILD_ID FROM {table}""") as cursor:
             data = await cursor.fetchall()
-        for subreddit_name, in data:
-            async with self.conn.execute("""SELECT GUILD_ID FROM MODQUEUE WHERE SUBREDDIT_NAME==?""", [subreddit_name]) as cursor:
-                data2 = await cursor.fetchall()
-            guilds = [guild for guild, in data2]
+        subreddits: Dict[str, List[int]] = {}
+        for subreddit_name, guild_id in data:
+            subreddits.setdefault(subreddit_name, []).append(guild_id)
+        cursors = {}
+        if feed in self.CURSOR_FEEDS:
+            async with self.conn.execute("""SELECT SUBREDDIT_NAME, ITEM_KEY, CREATED_UTC FROM MOD_CURSORS WHERE FEED==?""", [feed]) as cursor:
+                cursors = {subreddit_name: (item_key, created_utc) for subreddit_name, item_key, created_utc in await cursor.fetchall()}
+        await asyncio.gather(*[self.poll_subreddit(subreddit_name, guilds, feed, handler, cursors.get(subreddit_name)) for subreddit_name, guilds in
+                               subreddits.items()])
+
+    @staticmethod
+    def item_key(item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment, asyncpraw.models.ModAction]) -> str:
+        return getattr(item, "fullname", None) or item.id
+
+    async def poll_subreddit(self, subreddit_name: str, guilds: List[int], feed: str, handler: Callable[..., Awaitable],
+                             cursor: Optional[Tuple[str, float]]):
+        """Fetch the new items of the feed, paging back with ``after``, and hand them to the handler oldest first. The page size follows the
+        size of the last backlog, so that bursts are drained in as few requests as possible.
+
+        For the feeds in ``CURSOR_FEEDS``, paging stops at the cursor, and without a cursor (a newly added subreddit) only the first page is
+        handled. Nothing is handed off unless the backlog was fetched completely, and the cursor only moves then, so a failed poll is retried
+        from the same point without delivering anything twice. The modqueue is fetched whole instead, since old items enter it whenever they
+        are reported; the handler dedupes it, and a complete fetch forgets the items that have left the queue."""
+        min_page, max_page = self.PAGE_SIZES
+        limit = self.page_sizes.get((subreddit_name, feed), min_page)
+        use_cursor = feed in self.CURSOR_FEEDS
+        items = []
+        complete = False
+        try:
+            listing = getattr((await self.reddit.subreddit(subreddit_name)).mod, feed)
+            params = {}
+            while True:
+                async with self.poll_budget:
+                    page = [item async for item in listing(limit=limit, params=params)]
+                new = list(itertools.takewhile(lambda item: cursor is None or (self.item_key(item) != cursor[0] and item.created_utc >= cursor[1]),
+                                               page))
+                items.extend(new)
+                if (use_cursor and (cursor is None or len(new) < len(page))) or len(page) < limit:
+                    break
+                params = {"after": self.item_key(page[-1])}
+                limit = min(limit * 2, max_page)
+            complete = True
+        except Exception as e:
+            logger.warning("Unable to get items for subreddit r/%s", subreddit_name, exc_info=e)
+        self.page_sizes[(subreddit_name, feed)] = max(min_page, min(len(items), max_page))
+        if use_cursor and not complete:
+            return
+        for item in reversed(items):
             try:
-                async for item in (await self.reddit.subreddit(subreddit_name)).mod.modqueue(limit=10):
-                    await self.modqueue_item(item, guilds)
+                await handler(item, guilds)
             except Exception as e:
-                logger.warning("Unable to get items for subreddit r/%s", subreddit_name, exc_info=e)
+                logger.warning("Unable to handle item %s of subreddit r/%s", self.item_key(item), subreddit_name, exc_info=e)
+        if not use_cursor:
+            if complete:
+                await self.prune_modqueue_seen(subreddit_name, items)
+        elif items:
+            async with self.conn.execute("""INSERT OR REPLACE INTO MOD_CURSORS(SUBREDDIT_NAME, FEED, ITEM_KEY, CREATED_UTC) VALUES (?, ?, ?, ?)""",
+                                         [subreddit_name, feed, self.item_key(items[0]), items[0].created_utc]):
+                pass
+
+    @discord.ext.tasks.loop(minutes=2)
+    async def modqueue_task(self):
+        if self.modqueue_seen is None:
+            await self.pre_create()
+            async with self.conn.execute("""SELECT FULLNAME, NUM_REPORTS FROM MODQUEUE_SEEN""") as cursor:
+                self.modqueue_seen = {fullname: num_reports async for fullname, num_reports in cursor}
+            logger.info("Loaded %s seen modqueue items.", len(self.modqueue_seen))
+        await self.poll_feed("MODQUEUE", "modqueue", self.modqueue_item)
+
+    async def queue_item_seen(self, item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment]) -> bool:
+        """Record the modqueue item with its report count, returning whether it had already been recorded with that count. A re-report
+        changes the count, which makes the item new again."""
+        num_reports = getattr(item, "num_reports", 0) or 0
+        if self.modqueue_seen.get(item.fullname) == num_reports:
+            return True
+        self.modqueue_seen[item.fullname] = num_reports
+        async with self.conn.execute("""INSERT OR REPLACE INTO MODQUEUE_SEEN(FULLNAME, SUBREDDIT_NAME, NUM_REPORTS) VALUES (?, ?, ?)""",
+                                     [item.fullname, str(item.subreddit).lower(), num_reports]):
+            pass
+        return False
+
+    async def prune_modqueue_seen(self, subreddit_name: str, items: List[Union[asyncpraw.models.Submission, asyncpraw.models.Comment]]):
+        """Forget the items of the subreddit that are no longer in its modqueue, so that they are delivered again if they come back."""
+        in_queue = {item.fullname for item in items}
+        async with self.conn.execute("""SELECT FULLNAME FROM MODQUEUE_SEEN WHERE SUBREDDIT_NAME==?""", [subreddit_name.lower()]) as cursor:
+            gone = [fullname async for fullname, in cursor if fullname not in in_queue]
+        for fullname in gone:
+            self.modqueue_seen.pop(fullname, None)
+        if gone:
+            async with self.conn.executemany("""DELETE FROM MODQUEUE_SEEN WHERE FULLNAME==?""", [[fullname] for fullname in gone]):
+                pass
 
     async def modqueue_item(self, item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment], guilds: List[int] = None,
                             _channel: Union[discord.TextChannel, discord.ext.commands.Context] = None):
@@ -92,53 +206,90 @@ class RedditMod(PokestarBotCog):
             raise ValueError("Either 'guilds' or '_channel' has to be specified.")
         elif guilds is None:
             guilds = [_channel.guild]
-        if not self.modqueue.check(item, getattr(item, "num_reports", 0)):
-            self.modqueue.add(item, getattr(item, "num_reports", 0))
-        else:
-            if not _channel:
-                return
+        if not _channel and await self.queue_item_seen(item):
+            return
+        delivery = None
         for guild in guilds:
             if channel := self.bot.get_channel_data(guild, "modqueue"):
                 if channel not in self.modqueue_started and not _channel:
-                    await channel.send("-" * 20 + "New Modqueue Session" + "-" * 20)
                     self.modqueue_started.append(channel)
-                embed = discord.Embed(title="New Modqueue Item", timestamp=datetime.datetime.utcfromtimestamp(item.created_utc),
-                                      url="https://www.reddit.com" + item.permalink)
-                embed.set_footer(text=f"PokestarBot Version {bot_version}")
-                embed.add_field(name="Subreddit",
-                                value=f"[{item.subreddit.display_name}](https://www.reddit.com/r/{item.subreddit.display_name})")
-                embed.add_field(name="Item Type", value=item.__class__.__name__)
-                embed.add_field(name="Fullname", value=item.fullname)
-                embed.add_field(name="# Of Reports", value=str(item.num_reports))
-                fields = [("Mod Reports", "\n".join(
-                    [f"u/{user}: {reason}" for reason, user in item.mod_reports + (getattr(item, "mod_reports_dismissed", []) or [])]) or "None"),
-                          ("User Reports", "\n".join([f"{num} Users: {reason}" for reason, num in item.user_reports]) or "None"),
-                          ("Author", f"[{getattr(item.author, 'name', '[deleted]') or '[deleted]'}]"
-                                     f"(https://www.reddit.com/user/{getattr(item.author, 'name', '[deleted]') or '[deleted]'})")]
-                if isinstance(item, asyncpraw.models.Comment):
-                    description = item.body
-                    if len(description) > 1024:
-                        description = description[:1021] + "..."
-                    fields.extend([("Description", description)])
-                else:
-                    description = item.selftext or item.url
-                    if len(description) > 1024:
-                        description = description[:1021] + "..."
-                    fields.extend([("Title", item.title), ("Description", description)])
-                    image_url = item.url
-                    if not (not image_url.endswith(".jpg") and not image_url.endswith(".png") and not image_url.endswith(".jpeg")):
-                        embed.set_image(url=image_url)
-                    if hasattr(item, "gallery_data"):  # Gallery
-                        fields.append(("Is Gallery", "True"))
-                msg = (await send_embeds_fields(_channel or channel, embed, fields))[0]
-                await msg.add_reaction("✅")
-                await msg.add_reaction("🚫")
-                await msg.add_reaction("📛")
-                if isinstance(item, asyncpraw.models.Submission):
-                    await msg.add_reaction("🔞")
+                    await channel.send("-" * 20 + "New Modqueue Session" + "-" * 20)
+                delivery = delivery or self.modqueue_delivery(item)
+                self.removal_reasons.warm(str(item.subreddit).lower())
+                await self.deliver(_channel or channel, delivery, "modqueue")
             else:
                 continue
 
+    def modqueue_delivery(self, item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment]) -> Delivery:
+        embed = discord.Embed(title="New Modqueue Item", timestamp=datetime.datetime.utcfromtimestamp(item.created_utc),
+                              url="https://www.reddit.com" + item.permalink)
+        embed.set_footer(text=f"PokestarBot Version {bot_version}")
+        embed.add_field(name="Subreddit",
+                        value=f"[{item.subreddit.display_name}](https://www.reddit.com/r/{item.subreddit.display_name})")
+        embed.add_field(name="Item Type", value=item.__class__.__name__)
+        embed.add_field(name="Fullname", value=item.fullname)
+        embed.add_field(name="# Of Reports", value=str(item.num_reports))
+        fields = [("Mod Reports", "\n".join(
+            [f"u/{user}: {reason}" for reason, user in item.mod_reports + (getattr(item, "mod_reports_dismissed", []) or [])]) or "None"),
+                  ("User Reports", "\n".join([f"{num} Users: {reason}" for reason, num in item.user_reports]) or "None"),
+                  ("Author", f"[{getattr(item.author, 'name', '[deleted]') or '[deleted]'}]"
+                             f"(https://www.reddit.com/user/{getattr(item.author, 'name', '[deleted]') or '[deleted]'})")]
+        if isinstance(item, asyncpraw.models.Comment):
+            description = item.body
+            if len(description) > 1024:
+                description = description[:1021] + "..."
+            fields.extend([("Description", description)])
+        else:
+            description = item.selftext or item.url
+            if len(description) > 1024:
+                description = description[:1021] + "..."
+            fields.extend([("Title", item.title), ("Description", description)])
+            image_url = item.url
+            if not (not image_url.endswith(".jpg") and not image_url.endswith(".png") and not image_url.endswith(".jpeg")):
+                embed.set_image(url=image_url)
+            if hasattr(item, "gallery_data"):  # Gallery
+                fields.append(("Is Gallery", "True"))
+        reactions = ["✅", "🚫", "📛"]
+        if isinstance(item, asyncpraw.models.Submission):
+            reactions.append("🔞")
+        return Delivery(embed, fields, reactions, self.summary(item), item.fullname)
+
+    @staticmethod
+    def summary(item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment]) -> str:
+        text = (item.body if isinstance(item, asyncpraw.models.Comment) else item.title).replace("\n", " ")
+        if len(text) > 80:
+            text = text[:77] + "..."
+        return f"**{item.__class__.__name__}** in r/{item.subreddit.display_name}: [{text}](https://www.reddit.com{item.permalink}) " \
+               f"(`{item.fullname}`)"
+
+    async def deliver(self, destination: Union[discord.TextChannel, discord.ext.commands.Context], delivery: Delivery, feed: str):
+        """Queue the delivery on the channel's delivery queue. Command invocations (a Context) are answered directly instead."""
+        if isinstance(destination, discord.ext.commands.Context):
+            msg = (await send_embeds_fields(destination, copy.deepcopy(delivery.embed), list(delivery.fields)))[0]
+            await self.register_delivery(msg, delivery)
+            return await DeliveryQueue.add_reactions(msg, delivery.reactions)
+        if (queue := self.delivery_queues.get(destination.id)) is None:
+            queue = self.delivery_queues[destination.id] = DeliveryQueue(destination, f"{feed.title()} Digest", on_send=self.register_delivery,
+                                                                         on_digest=functools.partial(self.register_digest, feed))
+        queue.put(delivery)
+
+    async def register_delivery(self, msg: discord.Message, delivery: Delivery):
+        await self.bot.reaction_router.register(msg, self.name, delivery.data)
+
+    async def register_digest(self, feed: str, msg: discord.Message, deliveries: List[Delivery]):
+        """Register the digest page with the feed and the fullnames it lists, in the order of its number reactions."""
+        await self.bot.reaction_router.register(msg, self.name, feed + ":" + " ".join(delivery.data for delivery in deliveries))
+
+    async def expand_digest_item(self, ctx: discord.ext.commands.Context, data: str, emoji: str):
+        """Post the full delivery of the digest line picked with a number reaction, with its action reactions."""
+        feed, _, fullnames = data.partition(":")
+        fullnames = fullnames.split()
+        if (index := DeliveryQueue.DIGEST_REACTIONS.index(emoji)) >= len(fullnames):
+            return
+        if item := await self.bot.reddit_info.resolve(fullnames[index]):
+            delivery = self.modqueue_delivery(item) if feed == "modqueue" else self.unmoderated_delivery(item)
+            await self.deliver(ctx, delivery, feed)
+
     @discord.ext.commands.group(name="modqueue", invoke_without_command=True, brief="Manage the modqueue")
     async def modqueue_command(self, ctx: discord.ext.commands.Context):
         await self.bot.generic_help(ctx)
@@ -155,8 +306,7 @@ class RedditMod(PokestarBotCog):
                 await ctx.send(embed=embed)
             else:
                 try:
-                    async for _ in subreddit_obj.mod.removal_reasons:
-                        break
+                    await self.removal_reasons.load(str(subreddit_obj).lower())
                 except (asyncpraw.exceptions.PRAWException, asyncprawcore.exceptions.AsyncPrawcoreException):
                     embed = Embed(ctx, title="No Mod Permissions",
                                   description="The Reddit account used by the bot does not have the appropriate permissions.",
@@ -183,6 +333,7 @@ class RedditMod(PokestarBotCog):
         for subreddit in subreddits:
             async with self.bot.conn.execute("""DELETE FROM MODQUEUE WHERE SUBREDDIT_NAME==? AND GUILD_ID==?""", [subreddit, ctx.guild.id]):
                 pass
+            self.removal_reasons.invalidate(subreddit.lower())
             embed = Embed(ctx, title="Subreddit Removed From Modqueue",
                           description="The subreddit has been removed from the Guild's modqueue database.",
                           color=discord.Color.green())
@@ -222,6 +373,25 @@ class RedditMod(PokestarBotCog):
                 async for item in (await self.reddit.subreddit(subreddit_name)).mod.modqueue(limit=None):
                     await self.modqueue_item(item, _channel=ctx)
 
+    @modqueue_command.command(name="reasons", brief="Reload the removal reasons of subreddits.", usage="subreddit [subreddit]",
+                              aliases=["refresh"])
+    async def modqueue_reasons(self, ctx: discord.ext.commands.Context, *subreddits: str):
+        await self.bot.load_session()
+        for subreddit in subreddits:
+            self.removal_reasons.invalidate(subreddit.lower())
+            try:
+                reasons = await self.removal_reasons.load(subreddit.lower())
+            except (asyncpraw.exceptions.PRAWException, asyncprawcore.exceptions.AsyncPrawcoreException):
+                embed = Embed(ctx, title="Unable to Load Removal Reasons",
+                              description="The subreddit does not exist, or the Reddit account used by the bot does not have the appropriate "
+                                          "permissions.", color=discord.Color.red())
+            else:
+                embed = Embed(ctx, title="Removal Reasons Reloaded", description="The cached removal reasons of the subreddit have been reloaded.",
+                              color=discord.Color.green())
+                embed.add_field(name="Removal Reasons", value=str(len(reasons)))
+            embed.add_field(name="Subreddit", value=f"r/{subreddit}")
+            await ctx.send(embed=embed)
+
     @discord.ext.commands.group(name="unmoderated", invoke_without_command=True, brief="Manage the unmoderated")
     async def unmoderated_command(self, ctx: discord.ext.commands.Context):
         await self.bot.generic_help(ctx)
@@ -238,8 +408,7 @@ class RedditMod(PokestarBotCog):
                 await ctx.send(embed=embed)
             else:
                 try:
-                    async for _ in subreddit_obj.mod.removal_reasons:
-                        break
+                    await self.removal_reasons.load(str(subreddit_obj).lower())
                 except (asyncpraw.exceptions.PRAWException, asyncprawcore.exceptions.AsyncPrawcoreException):
                     embed = Embed(ctx, title="No Mod Permissions",
                                   description="The Reddit account used by the bot does not have the appropriate permissions.",
@@ -266,6 +435,7 @@ class RedditMod(PokestarBotCog):
         for subreddit in subreddits:
             async with self.bot.conn.execute("""DELETE FROM UNMODERATED WHERE SUBREDDIT_NAME==? AND GUILD_ID==?""", [subreddit, ctx.guild.id]):
                 pass
+            self.removal_reasons.invalidate(subreddit.lower())
             embed = Embed(ctx, title="Subreddit Removed From Unmoderated",
                           description="The subreddit has been removed from the Guild's unmoderated database.",
                           color=discord.Color.green())
@@ -307,19 +477,7 @@ class RedditMod(PokestarBotCog):
 
     @discord.ext.tasks.loop(minutes=2)
     async def unmoderated_task(self):
-        await self.pre_create()
-        await self.bot.load_session()
-        async with self.conn.execute("""SELECT DISTINCT SUBREDDIT_NAME FROM UNMODERATED""") as cursor:
-            data = await cursor.fetchall()
-        for subreddit_name, in data:
-            async with self.conn.execute("""SELECT GUILD_ID FROM UNMODERATED WHERE SUBREDDIT_NAME==?""", [subreddit_name]) as cursor:
-                data2 = await cursor.fetchall()
-            guilds = [guild for guild, in data2]
-            try:
-                async for item in (await self.reddit.subreddit(subreddit_name)).mod.unmoderated(limit=10):
-                    await self.unmoderated_item(item, guilds)
-            except Exception as e:
-                logger.warning("Unable to get items for subreddit r/%s", subreddit_name, exc_info=e)
+        await self.poll_feed("UNMODERATED", "unmoderated", self.unmoderated_item)
 
     async def unmoderated_item(self, item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment], guilds=None,
                                _channel: Union[discord.TextChannel, discord.ext.commands.Context] = None):
@@ -332,115 +490,96 @@ class RedditMod(PokestarBotCog):
         else:
             if not _channel:
                 return
+        delivery = None
         for guild in guilds:
             if channel := self.bot.get_channel_data(guild, "unmoderated"):
                 if channel not in self.unmoderated_started and not _channel:
-                    await channel.send("-" * 20 + "New Unmoderated Session" + "-" * 20)
                     self.unmoderated_started.append(channel)
-                embed = discord.Embed(title="New Unmoderated Item", timestamp=datetime.datetime.utcfromtimestamp(item.created_utc),
-                                      url="https://www.reddit.com" + item.permalink)
-                embed.set_footer(text=f"PokestarBot Version {bot_version}")
-                embed.add_field(name="Subreddit",
-                                value=f"[{item.subreddit.display_name}](https://www.reddit.com/r/{item.subreddit.display_name})")
-                embed.add_field(name="Item Type", value=item.__class__.__name__)
-                embed.add_field(name="Fullname", value=item.fullname)
-                fields = [("Author", f"[{getattr(item.author, 'name', '[deleted]') or '[deleted]'}]"
-                                     f"(https://www.reddit.com/user/{getattr(item.author, 'name', '[deleted]') or '[deleted]'})")]
-                description = item.selftext or item.url
-                if len(description) > 1024:
-                    description = description[:1021] + "..."
-                fields.extend([("Title", item.title), ("Description", description)])
-                image_url = item.url
-                if not (not image_url.endswith(".jpg") and not image_url.endswith(".png") and not image_url.endswith(".jpeg")):
-                    embed.set_image(url=image_url)
-                if hasattr(item, "gallery_data"):  # Gallery
-                    fields.append(("Is Gallery", "True"))
-                msg = (await send_embeds_fields(_channel or channel, embed, fields))[0]
-                await msg.add_reaction("✅")
-                await msg.add_reaction("🚫")
-                await msg.add_reaction("📛")
-                await msg.add_reaction("🔞")
+                    await channel.send("-" * 20 + "New Unmoderated Session" + "-" * 20)
+                delivery = delivery or self.unmoderated_delivery(item)
+                self.removal_reasons.warm(str(item.subreddit).lower())
+                await self.deliver(_channel or channel, delivery, "unmoderated")
+
+    def unmoderated_delivery(self, item: asyncpraw.models.Submission) -> Delivery:
+        embed = discord.Embed(title="New Unmoderated Item", timestamp=datetime.datetime.utcfromtimestamp(item.created_utc),
+                              url="https://www.reddit.com" + item.permalink)
+        embed.set_footer(text=f"PokestarBot Version {bot_version}")
+        embed.add_field(name="Subreddit",
+                        value=f"[{item.subreddit.display_name}](https://www.reddit.com/r/{item.subreddit.display_name})")
+        embed.add_field(name="Item Type", value=item.__class__.__name__)
+        embed.add_field(name="Fullname", value=item.fullname)
+        fields = [("Author", f"[{getattr(item.author, 'name', '[deleted]') or '[deleted]'}]"
+                             f"(https://www.reddit.com/user/{getattr(item.author, 'name', '[deleted]') or '[deleted]'})")]
+        description = item.selftext or item.url
+        if len(description) > 1024:
+            description = description[:1021] + "..."
+        fields.extend([("Title", item.title), ("Description", description)])
+        image_url = item.url
+        if not (not image_url.endswith(".jpg") and not image_url.endswith(".png") and not image_url.endswith(".jpeg")):
+            embed.set_image(url=image_url)
+        if hasattr(item, "gallery_data"):  # Gallery
+            fields.append(("Is Gallery", "True"))
+        return Delivery(embed, fields, ["✅", "🚫", "📛", "🔞"], self.summary(item), item.fullname)
 
     @discord.ext.tasks.loop(minutes=2)
     async def modlog_task(self):
-        await self.pre_create()
-        await self.bot.load_session()
-        async with self.conn.execute("""SELECT DISTINCT SUBREDDIT_NAME FROM MODLOG""") as cursor:
-            data = await cursor.fetchall()
-        for subreddit_name, in data:
-            async with self.conn.execute("""SELECT GUILD_ID FROM MODLOG WHERE SUBREDDIT_NAME==?""", [subreddit_name]) as cursor:
-                data2 = await cursor.fetchall()
-            guilds = [guild for guild, in data2]
-            try:
-                async for item in (await self.reddit.subreddit(subreddit_name)).mod.log(limit=10):
-                    await self.modlog_item(item, guilds)
-            except Exception as e:
-                logger.warning("Unable to get items for subreddit r/%s", subreddit_name, exc_info=e)
+        if self.seen_actions is None:
+            await self.pre_create()
+            await self.load_seen_actions()
+        await self.poll_feed("MODLOG", "log", self.modlog_item)
+
+    async def load_seen_actions(self):
+        async with self.conn.execute("""DELETE FROM MODLOG_SEEN WHERE CREATED_UTC < ?""", [time.time() - self.SEEN_RETENTION]):
+            pass
+        async with self.conn.execute("""SELECT ACTION_ID FROM MODLOG_SEEN""") as cursor:
+            action_ids = [action_id async for action_id, in cursor]
+        self.seen_actions = BloomFilter(capacity=max(modlog_seen_capacity, len(action_ids) * 2), error_rate=modlog_seen_error_rate,
+                                        keys=action_ids)
+        logger.info("Loaded %s seen modlog actions.", len(action_ids))
+
+    async def action_seen(self, item: asyncpraw.models.ModAction) -> bool:
+        """Record the mod action, returning whether it had already been recorded. Only a hit in the bloom filter is confirmed against the
+        MODLOG_SEEN table, so new actions are recorded without a lookup."""
+        if item.id in self.seen_actions:
+            async with self.conn.execute("""SELECT 1 FROM MODLOG_SEEN WHERE ACTION_ID==?""", [item.id]) as cursor:
+                if await cursor.fetchone() is not None:
+                    return True
+        self.seen_actions.add(item.id)
+        async with self.conn.execute("""INSERT OR IGNORE INTO MODLOG_SEEN(ACTION_ID, SUBREDDIT_NAME, CREATED_UTC) VALUES (?, ?, ?)""",
+                                     [item.id, str(item.subreddit), item.created_utc]):
+            pass
+        return False
 
     async def modlog_item(self, item: Union[asyncpraw.models.ModAction], guilds: List[int]):
-        if not self.modlog.check(item.id):
-            self.modlog.add(item.id)
-        else:
+        if await self.action_seen(item):
             return
+        channels = []
         for guild in guilds:
             if channel := self.bot.get_channel_data(guild, "modlog"):
                 if channel not in self.modlog_started:
-                    await channel.send("-" * 20 + "New Modlog Session" + "-" * 20)
                     self.modlog_started.append(channel)
-                action = item.action
-                if action in self.SUBMITTABLE_ACTIONS:
-                    prefix = self.SUBMITTABLE_ACTIONS.get(action, action)
-                    embed = discord.Embed(title=f"{prefix}: {item.target_title or item.target_fullname}",
-                                          timestamp=datetime.datetime.utcfromtimestamp(item.created_utc),
-                                          url="https://www.reddit.com" + item.target_permalink)
-                    description = str(item.target_body or item.description or item.details)
-                    if len(description) > 2048:
-                        description = description[:2045] + "..."
-                    embed.description = description
-                    embed.add_field(name="Subreddit", value=item.subreddit_name_prefixed)
-                    embed.add_field(name="Moderator", value=str(item.mod))
-                    embed.set_footer(text=f"Action ID: {item.id}")
-                    await channel.send(embed=embed)
-                elif action in self.USER_ACTIONS:
-                    prefix = self.USER_ACTIONS.get(action, action)
-                    embed = discord.Embed(title=f"{prefix}: {item.target_author or item.target_fullname}",
-                                          timestamp=datetime.datetime.utcfromtimestamp(item.created_utc))
-                    description = str(item.target_body or item.description or item.details)
-                    if len(description) > 2048:
-                        description = description[:2045] + "..."
-                    embed.description = description
-                    embed.add_field(name="Subreddit", value=item.subreddit_name_prefixed)
-                    embed.add_field(name="Moderator", value=str(item.mod))
-                    embed.set_footer(text=f"Action ID: {item.id}")
-                    await channel.send(embed=embed)
-                elif action == "add_community_topics":
-                    prefix = "Add Community Topics"
-                    embed = discord.Embed(title=f"{prefix}: {item.description}",
-                                          timestamp=datetime.datetime.utcfromtimestamp(item.created_utc))
-                    embed.add_field(name="Subreddit", value=item.subreddit_name_prefixed)
-                    embed.add_field(name="Moderator", value=str(item.mod))
-                    embed.set_footer(text=f"Action ID: {item.id}")
-                    await channel.send(embed=embed)
-                elif action == "createrule":
-                    prefix = "Create Rule"
-                    embed = discord.Embed(title=f"{prefix}: {item.details}",
-                                          timestamp=datetime.datetime.utcfromtimestamp(item.created_utc))
-                    embed.add_field(name="Subreddit", value=item.subreddit_name_prefixed)
-                    embed.add_field(name="Moderator", value=str(item.mod))
-                    embed.set_footer(text=f"Action ID: {item.id}")
-                    await channel.send(embed=embed)
-                else:
-                    prefix = action
-                    description = str(item.target_body or item.description or item.details)
-                    embed = discord.Embed(title=f"Other Action: {prefix}",
-                                          timestamp=datetime.datetime.utcfromtimestamp(item.created_utc))
-                    if len(description) > 2048:
-                        description = description[:2045] + "..."
-                    embed.description = description
-                    embed.add_field(name="Subreddit", value=item.subreddit_name_prefixed)
-                    embed.add_field(name="Moderator", value=str(item.mod))
-                    embed.set_footer(text=f"Action ID: {item.id}")
-                    await channel.send(embed=embed)
+                    await channel.send("-" * 20 + "New Modlog Session" + "-" * 20)
+                channels.append(channel)
+        if channels:
+            embed = self.modlog_embed(item)
+            await asyncio.gather(*[channel.send(embed=embed) for channel in channels])
+
+    def modlog_embed(self, item: asyncpraw.models.ModAction) -> discord.Embed:
+        """Render the mod action from its entry in the template table, falling back to the generic template for unknown actions."""
+        template = self.MODLOG_TEMPLATES.get(item.action, self.MODLOG_FALLBACK_TEMPLATE)
+        subject = next((value for attr in template.subject if (value := getattr(item, attr, None))), None)
+        embed = discord.Embed(title=f"{template.prefix}: {subject}", timestamp=datetime.datetime.utcfromtimestamp(item.created_utc))
+        if template.link:
+            embed.url = "https://www.reddit.com" + item.target_permalink
+        if template.description:
+            description = str(item.target_body or item.description or item.details)
+            if len(description) > 2048:
+                description = description[:2045] + "..."
+            embed.description = description
+        embed.add_field(name="Subreddit", value=item.subreddit_name_prefixed)
+        embed.add_field(name="Moderator", value=str(item.mod))
+        embed.set_footer(text=f"Action ID: {item.id}")
+        return embed
 
     @discord.ext.commands.group(name="modlog", invoke_without_command=True, brief="Manage the modlog")
     async def modlog_command(self, ctx: discord.ext.commands.Context):
@@ -458,8 +597,7 @@ class RedditMod(PokestarBotCog):
                 await ctx.send(embed=embed)
             else:
                 try:
-                    async for _ in subreddit_obj.mod.removal_reasons:
-                        break
+                    await self.removal_reasons.load(str(subreddit_obj).lower())
                 except (asyncpraw.exceptions.PRAWException, asyncprawcore.exceptions.AsyncPrawcoreException):
                     embed = Embed(ctx, title="No Mod Permissions",
                                   description="The Reddit account used by the bot does not have the appropriate permissions.",
@@ -486,6 +624,7 @@ class RedditMod(PokestarBotCog):
         for subreddit in subreddits:
             async with self.bot.conn.execute("""DELETE FROM MODLOG WHERE SUBREDDIT_NAME==? AND GUILD_ID==?""", [subreddit, ctx.guild.id]):
                 pass
+            self.removal_reasons.invalidate(subreddit.lower())
             embed = Embed(ctx, title="Subreddit Removed From Modlog",
                           description="The subreddit has been removed from the Guild's modlog database.",
                           color=discord.Color.green())
@@ -527,41 +666,46 @@ class RedditMod(PokestarBotCog):
     async def on_unmoderated_error(self, exception: Exception):
         logger.exception("Exception in the unmoderated task, aborting task:", exc_info=exception)
 
-    async def on_reaction(self, msg: discord.Message, emoji: Union[discord.PartialEmoji, discord.Emoji, str], user: discord.Member):
+    async def on_reaction(self, msg: discord.Message, emoji: Union[discord.PartialEmoji, discord.Emoji, str], user: discord.Member,
+                          fullname: Optional[str]):
         await self.bot.load_session()
-        if user.id == self.bot.user.id or user.bot or msg.author.id != self.bot.user.id:
+        if user.id == self.bot.user.id or user.bot or fullname is None:
             return
-        embed: discord.Embed = msg.embeds[0]
         ctx: CustomContext = await self.bot.get_context(msg, cls=CustomContext)
         ctx.author = user
-        #
-        if embed.title in ["New Modqueue Item", "New Unmoderated Item"]:
-            if "✅" in str(emoji):
-                async for item in self.reddit.info([embed.fields[2].value]):
-                    await item.mod.approve()
-                    embed = Embed(ctx, title="Approved Item", color=discord.Color.green())
-                    embed.add_field(name="Fullname", value=item.fullname)
-                    return await ctx.send(embed=embed)
-            elif "🚫" in str(emoji):
-                async for item in self.reddit.info([embed.fields[2].value]):
-                    await self.remove_item(ctx, item, spam=False)
-            elif "📛" in str(emoji):
-                async for item in self.reddit.info([embed.fields[2].value]):
-                    await self.remove_item(ctx, item, spam=True)
-            elif "🔞" in str(emoji):
-                async for item in self.reddit.info([embed.fields[2].value]):
-                    await item.mod.nsfw()
-                    embed = Embed(ctx, title="Marked Item as NSFW", color=discord.Color.green())
-                    embed.add_field(name="Fullname", value=item.fullname)
-                    return await ctx.send(embed=embed)
+        if ":" in fullname:  # A digest page
+            if str(emoji) in DeliveryQueue.DIGEST_REACTIONS:
+                await self.expand_digest_item(ctx, fullname, str(emoji))
+            return
+        if "✅" in str(emoji):
+            if item := await self.bot.reddit_info.resolve(fullname):
+                await item.mod.approve()
+                embed = Embed(ctx, title="Approved Item", color=discord.Color.green())
+                embed.add_field(name="Fullname", value=item.fullname)
+                return await ctx.send(embed=embed)
+        elif "🚫" in str(emoji):
+            if item := await self.bot.reddit_info.resolve(fullname):
+                await self.remove_item(ctx, item, spam=False)
+        elif "📛" in str(emoji):
+            if item := await self.bot.reddit_info.resolve(fullname):
+                await self.remove_item(ctx, item, spam=True)
+        elif "🔞" in str(emoji):
+            if item := await self.bot.reddit_info.resolve(fullname):
+                await item.mod.nsfw()
+                embed = Embed(ctx, title="Marked Item as NSFW", color=discord.Color.green())
+                embed.add_field(name="Fullname", value=item.fullname)
+                return await ctx.send(embed=embed)
+
+    async def load_removal_reasons(self, subreddit_name: str) -> List[asyncpraw.models.RemovalReason]:
+        async with self.poll_budget:
+            return [reason async for reason in (await self.reddit.subreddit(subreddit_name)).mod.removal_reasons]
 
     async def remove_item(self, ctx: discord.ext.commands.Context, item: Union[asyncpraw.models.Comment, asyncpraw.models.Submission], spam: bool):
         subreddit: asyncpraw.models.Subreddit = item.subreddit
         embed = Embed(ctx, title="Removal Reasons for " + subreddit.display_name, description="Type the number of the removal reason.")
         reasons = [None]
         num = 0
-        async for num, reason in aenumerate(subreddit.mod.removal_reasons, start=1):
-            reason: asyncpraw.models.RemovalReason
+        for num, reason in enumerate(await self.removal_reasons.get(str(subreddit).lower()), start=1):
             embed.add_field(name=str(num) + ": " + reason.title, value=reason.message)
             reasons.append(reason)
         embed.add_field(name=str(num + 1) + ": " + "No Reason", value="\u200b")
@@ -582,18 +726,6 @@ class RedditMod(PokestarBotCog):
                 embed.add_field(name="Removal Reason", value="No Reason")
             await ctx.send(embed=embed)
 
-    @discord.ext.commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        if payload.user_id == self.bot.user.id:
-            return
-        channel: discord.TextChannel = self.bot.get_channel(payload.channel_id)
-        message: discord.Message = await channel.fetch_message(payload.message_id)
-        guild: discord.Guild = self.bot.get_guild(payload.guild_id)
-        user: discord.Member = guild.get_member(payload.user_id)
-        emoji = payload.emoji
-
-        await self.on_reaction(message, emoji, user)
-
 
 def setup(bot: "PokestarBot"):
     bot.add_cog(RedditMod(bot))
@@ -1,34 +1,25 @@
 import asyncio
-import datetime
-import html
 import inspect
 import logging
-import re
 import sqlite3
-from typing import Optional, TYPE_CHECKING, Union
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING, Tuple, Union
 
-import bbcode
-import bs4
 import discord.ext.commands
 import discord.ext.tasks
-import feedparser
-import pytz
 
 from . import PokestarBotCog
-from ..utils import CustomContext, Embed, send_embeds_fields
-from ..const import bot_version, mangadex, guyamoe, nyaasi, horriblesubs
+from ..utils import BoundedDict, CustomContext, Embed, send_embeds_fields
+from ..utils.update_sources import GuyamoeSource, MangaDexSource, NonOKStatus, NyaasiSource, UpdateSource
+from ..const import legacy_update_tables, mention_limit
 
 if TYPE_CHECKING:
     from ..bot import PokestarBot
 
-NY = pytz.timezone("America/New_York")
-
 
 class Updates(PokestarBotCog):
-    GUYAMOE_URL = guyamoe
-    MANGADEX_URL = mangadex
-    NYAASI_URL = nyaasi
-    HORRIBLESUBS_TORRENT = horriblesubs
+    MENTION_LIMIT = mention_limit
+    LEGACY_TABLES = legacy_update_tables
+    SOURCES = (GuyamoeSource, MangaDexSource, NyaasiSource)
 
     @property
     def conn(self):
@@ -36,8 +27,10 @@ class Updates(PokestarBotCog):
 
     def __init__(self, bot: "PokestarBot"):
         super().__init__(bot)
-        self.parser = self.set_up_parser()
+        self.sources: Dict[str, UpdateSource] = {source.service: source(self.bot.worker_pool) for source in self.SOURCES}
         self.checked_for = []
+        self.mentions = BoundedDict(bound=1000)
+        self.bot.reaction_router.add_handler(self.name, self.on_reaction)
         self.check_for_updates.start()
         check = self.bot.has_channel("anime-and-manga-updates")
         self.bot.add_check_recursive(self.updates, check)
@@ -45,209 +38,95 @@ class Updates(PokestarBotCog):
 
     def cog_unload(self):
         self.check_for_updates.stop()
+        self.bot.reaction_router.remove_handler(self.name)
+
+    def match_source(self, url: str) -> Tuple[Optional[UpdateSource], Optional[str]]:
+        for source in self.sources.values():
+            if (reference := source.match(url)) is not None:
+                return source, reference
+        return None, None
 
-    @staticmethod
-    def render_url(name, value, options, parent, context):
-        if options and "url" in options:
-            href = options["url"]
-        else:
-            href = value
-        return "[{text}]({href})".format(href=href, text=html.unescape(value))
-
-    def set_up_parser(self):
-        parser = bbcode.Parser(newline="\n", install_defaults=False, escape_html=False, url_template="[{text}]({href})", replace_cosmetic=False)
-        parser.add_simple_formatter("b", "**%(value)s**", render_embedded=True)
-        parser.add_simple_formatter("i", "*%(value)s*", render_embedded=True)
-        parser.add_simple_formatter("u", "__%(value)s__", render_embedded=True)
-        parser.add_simple_formatter("hr", "\n\n", standalone=True, render_embedded=False)
-        parser.add_simple_formatter("spoiler", "||%(value)s||")
-        parser.add_simple_formatter("*", "", standalone=True)
-        parser.add_simple_formatter("img", "")
-        parser.add_simple_formatter("quote", "```\n%(value)s\n```")
-        parser.add_simple_formatter("code", "`%(value)s`")
-        parser.add_formatter("url", self.render_url, replace_links=False, replace_cosmetic=False)
-        return parser
+    def add_valid_urls(self, embed: discord.Embed):
+        for source in self.sources.values():
+            embed.add_field(name=source.name, value=source.url_template)
 
     async def pre_create(self):
         async with self.conn.execute(
-                """CREATE TABLE IF NOT EXISTS GUYAMOE(ID INTEGER PRIMARY KEY, SLUG TEXT, NAME TEXT NOT NULL, USER_ID UNSIGNED BIGINT NOT NULL, 
-                COMPLETED BOOLEAN NOT NULL DEFAULT FALSE, GUILD_ID BIGINT NOT NULL, UNIQUE (SLUG, NAME, USER_ID, GUILD_ID))"""):
+                """CREATE TABLE IF NOT EXISTS SUBSCRIPTIONS(ID INTEGER PRIMARY KEY, SERVICE TEXT NOT NULL, ITEM_KEY TEXT NOT NULL, NAME TEXT NOT NULL,
+                USER_ID UNSIGNED BIGINT NOT NULL, GUILD_ID BIGINT NOT NULL, COMPLETED BOOLEAN NOT NULL DEFAULT FALSE, UNIQUE (SERVICE, ITEM_KEY,
+                USER_ID, GUILD_ID))"""):
             pass
-        async with self.conn.execute(
-                """CREATE TABLE IF NOT EXISTS MANGADEX(ID INTEGER PRIMARY KEY, MANGA_ID INTEGER NOT NULL, NAME TEXT NOT NULL, USER_ID UNSIGNED 
-                BIGINT NOT NULL, COMPLETED BOOLEAN NOT NULL DEFAULT FALSE, GUILD_ID BIGINT NOT NULL, UNIQUE (MANGA_ID, NAME, USER_ID, GUILD_ID))"""):
+        async with self.conn.execute("""CREATE INDEX IF NOT EXISTS SUBSCRIPTIONS_ITEM ON SUBSCRIPTIONS(SERVICE, ITEM_KEY)"""):
             pass
-        async with self.conn.execute(
-                """CREATE TABLE IF NOT EXISTS NYAASI(ID INTEGER PRIMARY KEY, NAME TEXT NOT NULL, USER_ID UNSIGNED BIGINT NOT NULL, 
-                COMPLETED BOOLEAN NOT NULL DEFAULT FALSE, GUILD_ID BIGINT NOT NULL, UNIQUE(NAME, USER_ID, GUILD_ID))"""):
+        async with self.conn.execute("""CREATE INDEX IF NOT EXISTS SUBSCRIPTIONS_GUILD ON SUBSCRIPTIONS(GUILD_ID)"""):
             pass
         async with self.conn.execute(
-                """CREATE TABLE IF NOT EXISTS SEEN(ID INTEGER PRIMARY KEY, SERVICE TEXT NOT NULL, ITEM TEXT NOT NULL, CHAPTER TEXT NOT NULL, 
+                """CREATE TABLE IF NOT EXISTS SEEN(ID INTEGER PRIMARY KEY, SERVICE TEXT NOT NULL, ITEM TEXT NOT NULL, CHAPTER TEXT NOT NULL,
                 UNIQUE (SERVICE, ITEM, CHAPTER))"""):
             pass
+        await self.migrate_legacy_tables()
+
+    async def migrate_legacy_tables(self):
+        """Move the subscriptions in the old per-service tables into the SUBSCRIPTIONS table."""
+        async with self.conn.execute("""SELECT NAME FROM SQLITE_MASTER WHERE TYPE=='table'""") as cursor:
+            tables = {name for name, in await cursor.fetchall()}
+        for service, (table, key_column) in self.LEGACY_TABLES.items():
+            if table not in tables:
+                continue
+            logger.warning("Migrating the %s table into the SUBSCRIPTIONS table.", table)
+            async with self.conn.execute("""BEGIN IMMEDIATE TRANSACTION"""):
+                pass
+            try:
+                async with self.conn.execute(
+                        f"""INSERT OR IGNORE INTO SUBSCRIPTIONS(SERVICE, ITEM_KEY, NAME, USER_ID, GUILD_ID, COMPLETED) SELECT ?, {key_column},
+                        NAME, USER_ID, GUILD_ID, COMPLETED FROM {table}""", [service]):
+                    pass
+                async with self.conn.execute(f"""DROP TABLE {table}"""):
+                    pass
+            except Exception:
+                await self.conn.rollback()  # The connection is shared, so it must not be left inside the transaction
+                raise
+            await self.conn.commit()
 
     async def get_conn(self):
         await self.pre_create()
         return self.conn
 
-    async def guyamoe_info(self, ctx: discord.ext.commands.Context, slug: str, _info_only: bool = False):
-        url = f"https://guya.moe/api/series/{slug}/"
-        async with self.bot.session.get(url) as request:
-            if request.status != 200:
-                embed = Embed(ctx, title="Non-200 status code", description="The web request returned a non-200 status code",
-                              color=discord.Color.red())
-                embed.add_field(name="URL", value=url)
-                embed.add_field(name="Status Code", value=str(request.status))
-                return await ctx.send(embed=embed)
-            json = await request.json()
-        title = json['title']
-        description = json["description"]
-        author = json["author"]
-        artist = json["artist"]
-        image_url = "https://guya.moe" + json["cover"]
-        next_release = datetime.datetime.utcfromtimestamp(json["next_release_time"]).replace(tzinfo=pytz.UTC).astimezone(NY).strftime(
-            "%A, %B %d, %Y at %I:%M:%S %p")
-        chaps = [float(key) for key in json["chapters"].keys()]
-        latest_chapter = max(chaps)
-        if int(latest_chapter) == latest_chapter:
-            latest_chapter = int(latest_chapter)
-        embed = Embed(ctx, title=title, description=description)
-        embed.set_image(url=image_url)
-        if not _info_only:
-            embed.add_field(name="For User", value=ctx.author.mention)
-            embed.add_field(name="Service", value="Guya.moe")
-        embed.add_field(name="Link", value=f"https://guya.moe/read/manga/{slug}")
-        embed.add_field(name="Author", value=author or None)
-        embed.add_field(name="Artist", value=artist or None)
-        embed.add_field(name="Latest Chapter", value=str(latest_chapter))
-        embed.add_field(name="Next Chapter Published In", value=next_release)
-        msg = await ctx.send(embed=embed)
-        if _info_only:
-            return
-        await msg.add_reaction("✅")
+    async def info(self, ctx: discord.ext.commands.Context, source: UpdateSource, reference: str, _info_only: bool = False):
         try:
-            async with self.conn.execute("""INSERT INTO GUYAMOE(SLUG, NAME, USER_ID, GUILD_ID) VALUES (?, ?, ?, ?)""",
-                                         [slug, title, ctx.author.id, ctx.guild.id]):
-                pass
-        except sqlite3.IntegrityError:
-            logger.warning("", exc_info=True)
-            embed = Embed(ctx, title="Manga Exists", description="The manga has been already added.", color=discord.Color.red())
-            embed.add_field(name="Service", value="Guya.moe")
-            embed.add_field(name="Slug", value=str(slug))
+            info = await source.fetch_info(self.bot.session, reference)
+        except NonOKStatus as exc:
+            embed = Embed(ctx, title="Non-200 status code", description="The web request returned a non-200 status code", color=discord.Color.red())
+            embed.add_field(name="URL", value=exc.url)
+            embed.add_field(name="Status Code", value=str(exc.status))
             return await ctx.send(embed=embed)
-        async with self.conn.executemany("""INSERT OR IGNORE INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES ('Guyamoe', ?, ?)""",
-                                         [(slug, str(chap)) for chap in chaps]):
-            pass
-
-    async def mangadex_info(self, ctx: discord.ext.commands.Context, manga_id: int, _info_only: bool = False):
-        url = f"https://mangadex.org/api/manga/{manga_id}"
-        async with self.bot.session.get(url) as request:
-            if request.status != 200:
-                embed = Embed(ctx, title="Non-200 status code", description="The web request returned a non-200 status code",
-                              color=discord.Color.red())
-                embed.add_field(name="URL", value=url)
-                embed.add_field(name="Status Code", value=str(request.status))
-                return await ctx.send(embed=embed)
-            json = await request.json()
-        manga = json["manga"]
-        completed = manga["status"] == 1
-        description = self.parser.format(html.unescape(manga["description"]))
-        if len(description) > 2048:
-            description = description[:2045] + "..."
-        author = html.unescape(manga["author"])
-        artist = html.unescape(manga["artist"])
-        alt_names = "\n".join(html.unescape(name) for name in manga["alt_names"])
-        r18 = bool(manga["hentai"])
-        rating = manga["rating"]["bayesian"]
-        title = html.unescape(manga['title'])
-        image_url = f"https://www.mangadex.org{manga['cover_url']}"
-        latest_chapter = None
-        processed_chapters = []
-        for chapter_data in json["chapter"].values():
-            chap = chapter_data["chapter"] + ": " + chapter_data["title"]
-            if chapter_data["lang_code"] == "gb" and chap not in processed_chapters:
-                processed_chapters.append(chap)
-                if latest_chapter is None:
-                    latest_chapter = chap
-        embed = Embed(ctx, title=title, description=description)
-        embed.set_image(url=image_url)
+        embed = Embed(ctx, title=info.name, description=info.description or discord.Embed.Empty)
+        if info.image_url:
+            embed.set_image(url=info.image_url)
         if not _info_only:
             embed.add_field(name="For User", value=ctx.author.mention)
-            embed.add_field(name="Service", value="MangaDex")
-        embed.add_field(name="Link", value=f"https://mangadex.org/title/{manga_id}")
-        embed.add_field(name="Completed", value=str(completed))
-        embed.add_field(name="Author", value=author or "None")
-        embed.add_field(name="Artist", value=artist or "None")
-        embed.add_field(name="Alternate Names", value=alt_names or "None")
-        embed.add_field(name="R18", value=str(r18))
-        embed.add_field(name="Rating", value=str(rating))
-        embed.add_field(name="Latest Chapter", value=str(latest_chapter))
+            embed.add_field(name="Service", value=source.name)
+        for name, value in info.fields:
+            embed.add_field(name=name, value=value)
         msg = await ctx.send(embed=embed)
         if _info_only:
             return
+        if len(embed.fields) > 2:
+            await self.bot.reaction_router.register(msg, self.name, embed.fields[2].value)
         await msg.add_reaction("✅")
         try:
-            async with self.conn.execute("""INSERT INTO MANGADEX(MANGA_ID, NAME, USER_ID, GUILD_ID) VALUES (?, ?, ?, ?)""",
-                                         [manga_id, title, ctx.author.id, ctx.guild.id]):
+            async with self.conn.execute("""INSERT INTO SUBSCRIPTIONS(SERVICE, ITEM_KEY, NAME, USER_ID, GUILD_ID) VALUES (?, ?, ?, ?, ?)""",
+                                         [source.service, info.key, info.name, ctx.author.id, ctx.guild.id]):
                 pass
         except sqlite3.IntegrityError:
             logger.warning("", exc_info=True)
-            embed = Embed(ctx, title="Manga Exists", description="The manga has been already added.", color=discord.Color.red())
-            embed.add_field(name="Service", value="MangaDex")
-            embed.add_field(name="Manga ID", value=str(manga_id))
+            embed = Embed(ctx, title=f"{source.kind} Exists", description=f"The {source.kind.lower()} has been already added.",
+                          color=discord.Color.red())
+            embed.add_field(name="Service", value=source.name)
+            embed.add_field(name=source.key_label, value=info.key)
             return await ctx.send(embed=embed)
-        async with self.conn.executemany("""INSERT OR IGNORE INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES ('MangaDex', ?, ?)""",
-                                         [(str(manga_id), str(chap)) for chap in processed_chapters]):
-            pass
-
-    async def nyaasi_info(self, ctx: discord.ext.commands.Context, torrent_id: int, _get_name: bool = False, _info_only: bool = False):
-        url = f"https://nyaa.si/view/{torrent_id}"
-        async with self.bot.session.get(url) as request:
-            if request.status != 200:
-                embed = Embed(ctx, title="Non-200 status code", description="The web request returned a non-200 status code",
-                              color=discord.Color.red())
-                embed.add_field(name="URL", value=url)
-                embed.add_field(name="Status Code", value=str(request.status))
-                return await ctx.send(embed=embed)
-            text = await request.text()
-        soup = bs4.BeautifulSoup(text, features="lxml")
-        full_title = next(filter(lambda tag: self.HORRIBLESUBS_TORRENT.search(tag.text), soup.find_all(class_="panel-title")))
-        anime_name = self.HORRIBLESUBS_TORRENT.search(full_title.text).group(1)
-        if _get_name:
-            return anime_name
-        rss_link = f"https://nyaa.si/?page=rss&q={anime_name.replace(' ', '+')}&c=0_0&f=0&u=HorribleSubs"
-        async with self.bot.session.get(rss_link) as request:
-            if request.status != 200:
-                embed = Embed(ctx, title="Non-200 status code", description="The web request returned a non-200 status code",
-                              color=discord.Color.red())
-                embed.add_field(name="URL", value=url)
-                embed.add_field(name="Status Code", value=str(request.status))
-                return await ctx.send(embed=embed)
-            text = await request.text()
-        data = feedparser.parse(text)
-        episodes = {int(self.HORRIBLESUBS_TORRENT.search(entry["title"]).group(2)) for entry in data["entries"]}
-        latest_episode = max(episodes)
-        embed = Embed(ctx, title=anime_name)
-        if not _info_only:
-            embed.add_field(name="For User", value=ctx.author.mention)
-            embed.add_field(name="Service", value="Nyaa.si")
-            embed.add_field(name="Initial Torrent Link (for adding)", value=url)
-        embed.add_field(name="Latest Episode", value=str(latest_episode))
-        msg = await ctx.send(embed=embed)
-        if _info_only:
-            return
-        await msg.add_reaction("✅")
-        try:
-            async with self.conn.execute("INSERT INTO NYAASI(NAME, USER_ID, GUILD_ID) VALUES (?, ?, ?)", [anime_name, ctx.author.id, ctx.guild.id]):
-                pass
-        except sqlite3.IntegrityError:
-            logger.warning("", exc_info=True)
-            embed = Embed(ctx, title="Anime Exists", description="The anime has been already added.", color=discord.Color.red())
-            embed.add_field(name="Service", value="Nyaa.si")
-            embed.add_field(name="Anime Name", value=anime_name)
-            return await ctx.send(embed=embed)
-        async with self.conn.executemany("""INSERT OR IGNORE INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES ('Nyaasi', ?, ?)""",
-                                         [(anime_name, str(episode)) for episode in episodes]):
+        async with self.conn.executemany("""INSERT OR IGNORE INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES (?, ?, ?)""",
+                                         [(source.service, info.key, release) for release in info.releases]):
             pass
 
     @discord.ext.commands.group(brief="Manage the manga updates system.", invoke_without_command=True, usage="subcommand", aliases=["update"])
@@ -260,28 +139,18 @@ class Updates(PokestarBotCog):
         if len(urls) == 0:
             embed = Embed(ctx, title="No URLs Specified",
                           description="You need to specify a valid URL. The different valid types of URLs are specified.", color=discord.Color.red())
-            embed.add_field(name="Guya.moe", value="https://guya.moe/read/manga/<manga-name>")
-            embed.add_field(name="MangaDex", value="https://mangadex.org/title/<manga-id>")
-            embed.add_field(name="Nyaa.si", value="https://nyaa.si/view/<torrent-id>")
+            self.add_valid_urls(embed)
             return await ctx.send(embed=embed)
         for url in urls:
-            if match := self.GUYAMOE_URL.match(url):
-                slug = match.group(1)
-                await self.guyamoe_info(ctx, slug)
-            elif match := self.MANGADEX_URL.match(url):
-                manga_id = int(match.group(1))
-                await self.mangadex_info(ctx, manga_id)
-            elif match := self.NYAASI_URL.match(url):
-                torrent_id = int(match.group(1))
-                await self.nyaasi_info(ctx, torrent_id)
+            source, reference = self.match_source(url)
+            if source is not None:
+                await self.info(ctx, source, reference)
             else:
                 embed = Embed(ctx, title="Invalid URL",
                               description="The given URL is not recognized by the bot. Look at the supported services that are attached on this "
                                           "Embed.",
                               color=discord.Color.red())
-                embed.add_field(name="Guya.moe", value="https://guya.moe/read/manga/<manga-name>")
-                embed.add_field(name="MangaDex", value="https://mangadex.org/title/<manga-id>")
-                embed.add_field(name="Nyaa.si", value="https://nyaa.si/view/<torrent-id>")
+                self.add_valid_urls(embed)
                 await ctx.send(embed=embed)
 
     @updates.command(brief="Remove a manga from the updates", usage="url [url] [...]")
@@ -290,210 +159,109 @@ class Updates(PokestarBotCog):
         if len(urls) == 0:
             embed = Embed(ctx, title="No URLs Specified",
                           description="You need to specify a valid URL. The different valid types of URLs are specified.", color=discord.Color.red())
-            embed.add_field(name="Guya.moe", value="https://guya.moe/read/manga/<manga-name>")
-            embed.add_field(name="MangaDex", value="https://mangadex.org/title/<manga-id>")
-            embed.add_field(name="Nyaa.si", value="https://nyaa.si/view/<torrent-id>")
+            self.add_valid_urls(embed)
             return await ctx.send(embed=embed)
         for url in urls:
-            if match := self.GUYAMOE_URL.match(url):
-                slug = match.group(1)
-                async with self.conn.execute("""DELETE FROM GUYAMOE WHERE SLUG==? AND USER_ID==? AND GUILD_ID==?""",
-                                             [slug, ctx.author.id, ctx.guild.id]):
-                    pass
-                # async with self.conn.execute("""DELETE FROM SEEN WHERE SERVICE=='Guyamoe' AND ITEM==?""", [slug]):
-                # pass
-                embed = Embed(ctx, color=discord.Color.green(), title="Manga Removed")
-                embed.add_field(name="Service", value="Guya.moe")
-                embed.add_field(name="Slug", value=slug)
-                await ctx.send(embed=embed)
-            elif match := self.MANGADEX_URL.match(url):
-                manga_id = int(match.group(1))
-                async with self.conn.execute("""DELETE FROM MANGADEX WHERE MANGA_ID==? AND USER_ID==? AND GUILD_ID==?""",
-                                             [manga_id, ctx.author.id, ctx.guild.id]):
-                    pass
-                embed = Embed(ctx, color=discord.Color.green(), title="Manga Removed")
-                embed.add_field(name="Service", value="MangaDex")
-                embed.add_field(name="Manga ID", value=str(manga_id))
-                await ctx.send(embed=embed)
-            elif match := self.NYAASI_URL.match(url):
-                torrent_id = int(match.group(1))
-                name = await self.nyaasi_info(ctx, torrent_id, _get_name=True)
-                async with self.conn.execute("""DELETE FROM NYAASI WHERE NAME==? AND USER_ID==? AND GUILD_ID==?""",
-                                             [name, ctx.author.id, ctx.guild.id]):
+            source, reference = self.match_source(url)
+            if source is not None:
+                key = await source.resolve_key(self.bot.session, reference)
+                async with self.conn.execute("""DELETE FROM SUBSCRIPTIONS WHERE SERVICE==? AND ITEM_KEY==? AND USER_ID==? AND GUILD_ID==?""",
+                                             [source.service, key, ctx.author.id, ctx.guild.id]):
                     pass
                 embed = Embed(ctx, color=discord.Color.green(), title="Manga Removed")
-                embed.add_field(name="Service", value="Nyaa.si")
-                embed.add_field(name="Anime Name", value=name)
+                embed.add_field(name="Service", value=source.name)
+                embed.add_field(name=source.key_label, value=key)
                 await ctx.send(embed=embed)
             else:
                 embed = Embed(ctx, title="Invalid URL",
                               description="The given URL is not recognized by the bot. Look at the supported services that are attached on this "
                                           "Embed.",
                               color=discord.Color.red())
-                embed.add_field(name="Guya.moe", value="https://guya.moe/read/manga/<manga-name>")
-                embed.add_field(name="MangaDex", value="https://mangadex.org/title/<manga-id>")
-                embed.add_field(name="Nyaa.si", value="https://nyaa.si/view/<torrent-id>")
+                self.add_valid_urls(embed)
                 await ctx.send(embed=embed)
 
     @updates.command(brief="List the current mangas that will give notifications", usage="[user]")
     async def list(self, ctx: discord.ext.commands.Context, user: Optional[discord.Member] = None):
         await self.get_conn()
-        user_data = {}
-        slug_data = {}
         embed = Embed(ctx, title="Mangas in Update List")
-        fields = []
-        async with self.conn.execute("""SELECT SLUG, NAME, USER_ID FROM GUYAMOE WHERE GUILD_ID==?""", [ctx.guild.id]) as cursor:
-            data = await cursor.fetchall()
-        for slug, name, user_id in data:
-            member: discord.Member = ctx.guild.get_member(user_id)
-            slug_data.setdefault(slug, name)
-            members = user_data.setdefault(slug, [])
-            members.append(member.mention)
-        for slug in sorted(set(slug_data.keys())):
-            if not user or user.mention in user_data[slug]:
-                fields.append((slug_data[slug] + " [Guya.moe]", "\n".join((f"Link: https://guya.moe/read/manga/{slug}", ", ".join(user_data[slug])))))
-        user_data = {}
-        slug_data = {}
-        async with self.conn.execute("""SELECT MANGA_ID, NAME, USER_ID FROM MANGADEX WHERE GUILD_ID==?""", [ctx.guild.id]) as cursor:
-            data = await cursor.fetchall()
-        for slug, name, user_id in data:
-            member: discord.Member = ctx.guild.get_member(user_id)
-            slug_data.setdefault(slug, name)
-            members = user_data.setdefault(slug, [])
-            members.append(member.mention)
-        for slug in sorted(set(slug_data.keys())):
-            if not user or user.mention in user_data[slug]:
-                fields.append((slug_data[slug] + " [MangaDex]", "\n".join((f"Link: https://mangadex.org/title/{slug}", ", ".join(user_data[slug])))))
-        async with self.conn.execute("""SELECT NAME, USER_ID FROM NYAASI WHERE GUILD_ID==?""", [ctx.guild.id]) as cursor:
+        async with self.conn.execute("""SELECT SERVICE, ITEM_KEY, NAME, USER_ID FROM SUBSCRIPTIONS WHERE GUILD_ID==? ORDER BY SERVICE, ITEM_KEY""",
+                                     [ctx.guild.id]) as cursor:
             data = await cursor.fetchall()
+        names = {}
         user_data = {}
-        for name, user_id in data:
-            member: discord.Member = ctx.guild.get_member(user_id)
-            members = user_data.setdefault(name, [])
-            members.append(member.mention)
-        for name in sorted(user_data.keys()):
-            if not user or user.mention in user_data[name]:
-                fields.append((name + " [Nyaa.i]", ", ".join(user_data[name])))
+        for service, key, name, user_id in data:
+            names.setdefault((service, key), name)
+            user_data.setdefault((service, key), []).append(user_id)
+        fields = []
+        for service, source in self.sources.items():
+            for item in sorted(item for item in names if item[0] == service):
+                if not user or user.id in user_data[item]:
+                    mentions = ", ".join(self.get_mention(ctx.guild, user_id) for user_id in user_data[item])
+                    fields.append((f"{names[item]} [{source.name}]", "\n".join((f"Link: {source.link(item[1])}", mentions))))
         await send_embeds_fields(ctx, embed, fields)
 
-    async def guyamoe_update(self, slug: str, name: str):
-        url = f"https://guya.moe/api/series/{slug}/"
-        async with self.bot.session.get(url) as request:
-            request.raise_for_status()
-            json = await request.json()
-        chaps = {str(float(key)) for key in json["chapters"].keys()}
-        async with self.conn.execute("""SELECT CHAPTER FROM SEEN WHERE SERVICE==? AND ITEM==?""", ["Guyamoe", slug]) as cursor:
-            data = await cursor.fetchall()
-        seen_chaps = {chap for chap, in data}
-        new_chaps = chaps - seen_chaps
-        if len(new_chaps) > 0:
-            logger.debug(str(new_chaps))
-        async with self.conn.execute("""SELECT USER_ID, GUILD_ID FROM GUYAMOE WHERE SLUG==?""", [slug]) as cursor:
-            data = await cursor.fetchall()
-        for chap in sorted(new_chaps):
-            num_chap = float(chap)
-            int_chap = int(num_chap)
-            if int_chap == num_chap:
-                num_chap = int_chap
-            logger.info("New Chapter: %s chapter %s", name, num_chap)
-            link = f"https://guya.moe/read/manga/{slug}/{str(num_chap).replace('.', '-')}"
-            embed = discord.Embed(color=discord.Color.green(), title="New Chapter")
-            embed.set_footer(text=f"PokestarBot Version {bot_version}")
-            embed.add_field(name="Service", value="Guya.moe")
-            embed.add_field(name="Manga", value=name)
-            embed.add_field(name="Chapter", value=str(num_chap))
-            embed.add_field(name="Link", value=link)
-            for user_id, guild_id in data:
-                dest = self.bot.get_channel_data(guild_id, "anime-and-manga-updates")
-                if dest is None:
-                    continue
-                user = dest.guild.get_member(user_id) or await self.bot.fetch_user(user_id)
-                await dest.send(user.mention, embed=embed)
-        async with self.conn.executemany("""INSERT INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES('Guyamoe', ?, ?)""",
-                                         [(slug, chap) for chap in new_chaps]):
-            pass
-
-    async def mangadex_update(self, manga_id: int, name: str):
-        url = f"https://mangadex.org/api/manga/{manga_id}"
-        async with self.bot.session.get(url) as request:
-            request.raise_for_status()
-            json = await request.json()
-        processed_chapters = {}
-        for chap_key, chapter_data in json["chapter"].items():
-            chap = chapter_data["chapter"] + ": " + chapter_data["title"]
-            if chapter_data["lang_code"] == "gb" and chap not in processed_chapters:
-                processed_chapters[chap] = chap_key
-        chaps = set(processed_chapters.keys())
-        nums = [chap.partition(":")[0] for chap in chaps]
-        if json["manga"]["last_chapter"] in nums and str(json["manga"]["last_chapter"]) != "0":
-            async with self.conn.execute("""UPDATE MANGADEX SET COMPLETED=TRUE WHERE MANGA_ID==?""", [manga_id]):
-                pass
-        async with self.conn.execute("""SELECT CHAPTER FROM SEEN WHERE SERVICE==? AND ITEM==?""", ["MangaDex", str(manga_id)]) as cursor:
-            data = await cursor.fetchall()
-        seen_chaps = {chap for chap, in data}
-        new_chaps = chaps - seen_chaps
-        if len(new_chaps) > 0:
-            logger.debug(str(new_chaps))
-        async with self.conn.execute("""SELECT USER_ID, GUILD_ID FROM MANGADEX WHERE MANGA_ID==?""", [manga_id]) as cursor:
-            data = await cursor.fetchall()
-        for chap in sorted(new_chaps):
-            logger.info("New Chapter: %s chapter %s", name, chap)
-            chap_id = processed_chapters[chap]
-            link = f"https://mangadex.org/chapter/{chap_id}/"
-            embed = discord.Embed(color=discord.Color.green(), title="New Chapter")
-            embed.set_footer(text=f"PokestarBot Version {bot_version}")
-            embed.add_field(name="Service", value="MangaDex")
-            embed.add_field(name="Manga", value=name)
-            embed.add_field(name="Chapter", value=chap)
-            embed.add_field(name="Link", value=link)
-            for user_id, guild_id in data:
-                dest = self.bot.get_channel_data(guild_id, "anime-and-manga-updates")
-                if dest is None:
-                    continue
-                user = dest.guild.get_member(user_id) or await self.bot.fetch_user(user_id)
-                await dest.send(user.mention, embed=embed)
-        async with self.conn.executemany("""INSERT INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES('MangaDex', ?, ?)""",
-                                         [(str(manga_id), chap) for chap in new_chaps]):
-            pass
-
-    async def nyaasi_update(self, anime_name: str):
-        rss_link = f"https://nyaa.si/?page=rss&q={anime_name.replace(' ', '+')}&c=0_0&f=0&u=HorribleSubs"
-        async with self.bot.session.get(rss_link) as request:
-            request.raise_for_status()
-            text = await request.text()
-        data = feedparser.parse(text)
-        episodes = {}
-        for entry in data["entries"]:
-            search = self.HORRIBLESUBS_TORRENT.search(entry["title"])
-            number, resolution = search.group(2, 3)
-            if int(resolution) != 1080:
+    def get_mention(self, guild: discord.Guild, user_id: int) -> str:
+        key = (guild.id, user_id)
+        if (mention := self.mentions.get(key)) is None:
+            member = guild.get_member(user_id)
+            mention = self.mentions[key] = member.mention if member else f"<@{user_id}>"
+        return mention
+
+    @classmethod
+    def group_mentions(cls, mentions: List[str]) -> List[str]:
+        """Split the mentions into message contents that fit into Discord's length and mention limits."""
+        groups = []
+        current = []
+        length = 0
+        for mention in mentions:
+            if current and (len(current) >= cls.MENTION_LIMIT or length + len(mention) + 1 > 2000):
+                groups.append(" ".join(current))
+                current = []
+                length = 0
+            current.append(mention)
+            length += len(mention) + 1
+        if current:
+            groups.append(" ".join(current))
+        return groups
+
+    async def send_notification(self, dest: discord.TextChannel, embed: discord.Embed, mentions: List[str]):
+        groups = self.group_mentions(mentions)
+        await dest.send(groups.pop(0), embed=embed)
+        for group in groups:
+            await dest.send(group)
+
+    async def notify(self, embed: discord.Embed, subscribers: Iterable[Tuple[int, int]]):
+        destinations: Dict[discord.TextChannel, List[str]] = {}
+        for user_id, guild_id in subscribers:
+            dest = self.bot.get_channel_data(guild_id, "anime-and-manga-updates")
+            if dest is None:
                 continue
-            episodes[int(number)] = entry["link"]
-        async with self.conn.execute("""SELECT CHAPTER FROM SEEN WHERE SERVICE==? AND ITEM==?""", ["Nyaasi", anime_name]) as cursor:
-            data = await cursor.fetchall()
-        seen_eps = {int(ep) for ep, in data}
-        new_eps = set(episodes.keys()) - seen_eps
-        if len(new_eps) > 0:
-            logger.debug(str(new_eps))
-        async with self.conn.execute("""SELECT USER_ID, GUILD_ID FROM NYAASI WHERE NAME==?""", [anime_name]) as cursor:
+            mentions = destinations.setdefault(dest, [])
+            mention = self.get_mention(dest.guild, user_id)
+            if mention not in mentions:
+                mentions.append(mention)
+        results = await asyncio.gather(*[self.send_notification(dest, embed, mentions) for dest, mentions in destinations.items()],
+                                       return_exceptions=True)
+        for dest, result in zip(destinations, results):
+            if isinstance(result, Exception):
+                logger.warning("Unable to send the %s notification to %s (%s)", embed.title, dest, dest.guild, exc_info=result)
+
+    async def update(self, source: UpdateSource, key: str, name: str, subscribers: List[Tuple[int, int]]):
+        releases, completed = await source.fetch_releases(self.bot.session, key)
+        if completed:
+            async with self.conn.execute("""UPDATE SUBSCRIPTIONS SET COMPLETED=TRUE WHERE SERVICE==? AND ITEM_KEY==?""", [source.service, key]):
+                pass
+        async with self.conn.execute("""SELECT CHAPTER FROM SEEN WHERE SERVICE==? AND ITEM==?""", [source.service, key]) as cursor:
             data = await cursor.fetchall()
-        for ep in sorted(new_eps):
-            logger.info("New Episode: %s episode %s", anime_name, ep)
-            embed = discord.Embed(color=discord.Color.green(), title="New Episode")
-            embed.set_footer(text=f"PokestarBot Version {bot_version}")
-            embed.add_field(name="Service", value="Nyaa.si")
-            embed.add_field(name="Anime", value=anime_name)
-            embed.add_field(name="Episode #", value=ep)
-            embed.add_field(name="Link", value=episodes[ep])
-            embed.add_field(name="Search Page", value=f"https://nyaa.si/user/HorribleSubs?q={anime_name.replace(' ', '+')}&c=0_0&f=0")
-            for user_id, guild_id in data:
-                dest = self.bot.get_channel_data(guild_id, "anime-and-manga-updates")
-                if dest is None:
-                    continue
-                user = dest.guild.get_member(user_id) or await self.bot.fetch_user(user_id)
-                await dest.send(user.mention, embed=embed)
-        async with self.conn.executemany("""INSERT OR IGNORE INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES ('Nyaasi', ?, ?)""",
-                                         [(anime_name, str(episode)) for episode in episodes.keys()]):
+        new_releases = source.diff(releases, (chap for chap, in data))
+        if len(new_releases) > 0:
+            logger.debug(str(new_releases))
+        for release_key in new_releases:
+            release = releases[release_key]
+            logger.info("New %s: %s %s %s", source.release_kind, name, source.release_kind.lower(), release.label)
+            await self.notify(source.render_release(key, name, release), subscribers)
+        async with self.conn.executemany("""INSERT OR IGNORE INTO SEEN(SERVICE, ITEM, CHAPTER) VALUES (?, ?, ?)""",
+                                         [(source.service, key, release_key) for release_key in new_releases]):
             pass
 
     @updates.group(brief="Get the update loop statistics", aliases=["updateloop", "update_loop"], invoke_without_command=True)
@@ -518,86 +286,55 @@ class Updates(PokestarBotCog):
         self.check_for_updates.restart()
         await ctx.send(embed=Embed(ctx, title="Loop Restarted", description="The loop has been restarted.", color=discord.Color.green()))
 
-    @discord.ext.commands.command(brief="Get information on a manga on Guya.moe", usage="url [url] [...]", aliases=["guya.moe"])
-    async def guyamoe(self, ctx: discord.ext.commands.Context, *urls: str):
+    @updates.command(brief="Get the timings of the parsing worker pool")
+    @discord.ext.commands.is_owner()
+    async def parsing(self, ctx: discord.ext.commands.Context):
+        embed = Embed(ctx, title="Parsing Worker Pool", description="Time spent parsing pages, feeds and BBCode off of the event loop.")
+        fields = [(name, histogram.render()) for name, histogram in sorted(self.bot.worker_pool.timings.items())]
+        if not fields:
+            fields.append(("No Data", "Nothing has been parsed yet."))
+        await send_embeds_fields(ctx, embed, fields)
+
+    async def info_command(self, ctx: discord.ext.commands.Context, source: UpdateSource, urls: Tuple[str, ...]):
         if len(urls) == 0:
             raise discord.ext.commands.MissingRequiredArgument(inspect.Parameter("url", inspect.Parameter.POSITIONAL_ONLY))
         for url in urls:
-            if match := self.GUYAMOE_URL.match(url):
-                slug = match.group(1)
-                await self.guyamoe_info(ctx, slug, _info_only=True)
+            if (reference := source.match(url)) is not None:
+                await self.info(ctx, source, reference, _info_only=True)
             else:
                 embed = Embed(ctx, title="Invalid URL", description="The provided URL is invalid.", color=discord.Color.red())
                 embed.add_field(name="Provided URL", value=url)
-                embed.add_field(name="Valid URL", value="https://guya.moe/read/manga/<manga-name>")
+                embed.add_field(name="Valid URL", value=source.url_template)
                 await ctx.send(embed=embed)
 
+    @discord.ext.commands.command(brief="Get information on a manga on Guya.moe", usage="url [url] [...]", aliases=["guya.moe"])
+    async def guyamoe(self, ctx: discord.ext.commands.Context, *urls: str):
+        await self.info_command(ctx, self.sources[GuyamoeSource.service], urls)
+
     @discord.ext.commands.command(brief="Get information on a manga on MangaDex", usage="url [url] [...]")
     async def mangadex(self, ctx: discord.ext.commands.Context, *urls: str):
-        if len(urls) == 0:
-            raise discord.ext.commands.MissingRequiredArgument(inspect.Parameter("url", inspect.Parameter.POSITIONAL_ONLY))
-        for url in urls:
-            if match := self.MANGADEX_URL.match(url):
-                manga_id = int(match.group(1))
-                await self.mangadex_info(ctx, manga_id, _info_only=True)
-            else:
-                embed = Embed(ctx, title="Invalid URL", description="The provided URL is invalid.", color=discord.Color.red())
-                embed.add_field(name="Provided URL", value=url)
-                embed.add_field(name="Valid URL", value="https://mangadex.org/title/<manga-id>")
-                await ctx.send(embed=embed)
+        await self.info_command(ctx, self.sources[MangaDexSource.service], urls)
 
     @discord.ext.commands.command(brief="Get information on an anime provided by HorribleSubs on nyaa.si", usage="url [url] [...]",
                                   aliases=["nyaa.si"])
     async def nyaasi(self, ctx: discord.ext.commands.Context, *urls: str):
-        if len(urls) == 0:
-            raise discord.ext.commands.MissingRequiredArgument(inspect.Parameter("url", inspect.Parameter.POSITIONAL_ONLY))
-        for url in urls:
-            if match := self.NYAASI_URL.match(url):
-                torrent_id = int(match.group(1))
-                await self.nyaasi_info(ctx, torrent_id, _info_only=True)
-            else:
-                embed = Embed(ctx, title="Invalid URL", description="The provided URL is invalid.", color=discord.Color.red())
-                embed.add_field(name="Provided URL", value=url)
-                embed.add_field(name="Valid URL", value="https://nyaa.si/view/<torrent-id>")
-                await ctx.send(embed=embed)
+        await self.info_command(ctx, self.sources[NyaasiSource.service], urls)
 
     @discord.ext.tasks.loop(minutes=5)
     async def check_for_updates(self):
         await self.get_conn()
         await self.bot.load_session()
-        async with self.conn.execute("""SELECT DISTINCT SLUG, NAME FROM GUYAMOE WHERE COMPLETED==?""", [False]) as cursor:
-            guyamoe = await cursor.fetchall()
-        for slug, name in guyamoe:
-            if "GUYAMOE" + slug in self.checked_for:
-                continue
-            try:
-                await self.guyamoe_update(slug, name)
-            except:
-                raise
-            else:
-                self.checked_for.append("GUYAMOE" + slug)
-        async with self.conn.execute("""SELECT DISTINCT MANGA_ID, NAME FROM MANGADEX WHERE COMPLETED==?""", [False]) as cursor:
-            mangadex = await cursor.fetchall()
-        for manga_id, name in mangadex:
-            if "MANGADEX" + str(manga_id) in self.checked_for:
-                continue
-            try:
-                await self.mangadex_update(manga_id, name)
-            except:
-                raise
-            else:
-                self.checked_for.append("MANGADEX" + str(manga_id))
-        async with self.conn.execute("""SELECT DISTINCT NAME FROM NYAASI WHERE COMPLETED==?""", [False]) as cursor:
-            nyaasi = await cursor.fetchall()
-        for anime_name, in nyaasi:
-            if "NYAASI" + anime_name in self.checked_for:
+        async with self.conn.execute("""SELECT SERVICE, ITEM_KEY, NAME, USER_ID, GUILD_ID FROM SUBSCRIPTIONS WHERE COMPLETED==?""",
+                                     [False]) as cursor:
+            data = await cursor.fetchall()
+        items: Dict[Tuple[str, str], Tuple[str, List[Tuple[int, int]]]] = {}
+        for service, key, name, user_id, guild_id in data:
+            items.setdefault((service, key), (name, []))[1].append((user_id, guild_id))
+        for (service, key), (name, subscribers) in items.items():
+            if service + key in self.checked_for or (source := self.sources.get(service)) is None:
                 continue
-            try:
-                await self.nyaasi_update(anime_name)
-            except:
-                raise
-            else:
-                self.checked_for.append("NYAASI" + anime_name)
+            await self.update(source, key, name, subscribers)
+            self.checked_for.append(service + key)
         self.checked_for = []
 
     @check_for_updates.before_loop
@@ -608,62 +345,13 @@ class Updates(PokestarBotCog):
     async def on_check_for_updates_error(self, exception: BaseException):
         logger.exception("Exception occured inside the check_for_updates task: %s", exception, exc_info=exception)
 
-    async def on_reaction(self, msg: discord.Message, emoji: Union[discord.PartialEmoji, discord.Emoji], user: discord.Member):
-        if user.id == self.bot.user.id or user.bot or msg.author.id != self.bot.user.id:
+    async def on_reaction(self, msg: discord.Message, emoji: Union[discord.PartialEmoji, discord.Emoji], user: discord.Member, link: Optional[str]):
+        if user.id == self.bot.user.id or user.bot or link is None:
             return
-        embed: discord.Embed = msg.embeds[0]
         ctx: CustomContext = await self.bot.get_context(msg, cls=CustomContext)
         ctx.author = user
-        if len(embed.fields) > 1:
-            val = embed.fields[1].value
-            if val == "Guya.moe":
-                if embed.title == "Manga Removed":
-                    if "✅" in str(emoji):
-                        pass
-                    elif "🚫" in str(emoji):
-                        pass
-                else:
-                    if "✅" in str(emoji):
-                        link = embed.fields[2].value
-                        await self.add(ctx, link)
-                    elif "🚫" in str(emoji):
-                        pass
-            elif val == "MangaDex":
-                if embed.title == "Manga Removed":
-                    if "✅" in str(emoji):
-                        pass
-                    elif "🚫" in str(emoji):
-                        pass
-                else:
-                    if "✅" in str(emoji):
-                        link = embed.fields[2].value
-                        await self.add(ctx, link)
-                    elif "🚫" in str(emoji):
-                        pass
-            elif val == "Nyaa.si":
-                if embed.title == "Manga Removed":
-                    if "✅" in str(emoji):
-                        pass
-                    elif "🚫" in str(emoji):
-                        pass
-                else:
-                    if "✅" in str(emoji):
-                        link = embed.fields[2].value
-                        await self.add(ctx, link)
-                    elif "🚫" in str(emoji):
-                        pass
-
-    @discord.ext.commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        if payload.user_id == self.bot.user.id:
-            return
-        channel: discord.TextChannel = self.bot.get_channel(payload.channel_id)
-        message: discord.Message = await channel.fetch_message(payload.message_id)
-        guild: discord.Guild = self.bot.get_guild(payload.guild_id)
-        user: discord.Member = guild.get_member(payload.user_id)
-        emoji = payload.emoji
-
-        await self.on_reaction(message, emoji, user)
+        if "✅" in str(emoji):
+            await self.add(ctx, link)
 
 
 logger = logging.getLogger(__name__)
@@ -27,8 +27,12 @@ class Waifu(PokestarBotCog):
     def __init__(self, bot: "PokestarBot"):
         super().__init__(bot)
         self.guide_data = {}
+        self.bot.reaction_router.add_handler(self.name, self.on_reaction)
         self.embed.add_check(self.bot.has_channel("bot-spam"))
 
+    def cog_unload(self):
+        self.bot.reaction_router.remove_handler(self.name)
+
     def log_and_run(self, /, sql: str, arguments: Optional[Iterable[Union[str, int, float, bool, None]]] = None, *,
                     method: Literal["execute", "executemany", "executescript", "execute_insert", "execute_fetchall"] = "execute"):
         meth: Callable[[str, Optional[Iterable[Union[str, int, float, bool, None]]]], aiosqlite.Cursor] = getattr(self.conn, method)
@@ -245,6 +249,7 @@ class Waifu(PokestarBotCog):
                     fields = [("Waifu Bracket", str(bracket_id)), ("Bracket Division", str(division_id))]
                     messages = await send_embeds_fields(ctx, embed, fields)
                     msg = messages[0]
+                    await self.bot.reaction_router.register(msg, self.name)
                     await msg.add_reaction("✅")
                     await msg.add_reaction("🚫")
                     return
@@ -271,6 +276,7 @@ class Waifu(PokestarBotCog):
                     return l_name, l_anime, l_description, l_image_link, int(data_left), r_name, r_anime, r_description, r_image_link, int(data_right)
                 messages = await send_embeds_fields(ctx, embed, fields)
                 msg = messages[0]
+                await self.bot.reaction_router.register(msg, self.name)
                 await msg.add_reaction("⬅️")
                 await msg.add_reaction("ℹ️")
                 await msg.add_reaction("🚫")
@@ -789,6 +795,7 @@ class Waifu(PokestarBotCog):
                           ("Existing Choice", str(previous_choice))]
                 messages = await send_embeds_fields(ctx, embed, fields)
                 msg = messages[0]
+                await self.bot.reaction_router.register(msg, self.name)
                 await msg.add_reaction("🚫")
             else:
                 embed = Embed(ctx, title="Voted", description="You have successfully voted in the waifu war!", color=discord.Color.green())
@@ -797,6 +804,7 @@ class Waifu(PokestarBotCog):
                 embed.set_image(url=image_link)
                 messages = await send_embeds_fields(ctx, embed, fields)
                 msg = messages[0]
+                await self.bot.reaction_router.register(msg, self.name)
                 await msg.add_reaction("✅")
                 await msg.add_reaction("🚫")
                 if self.guide_data.get(ctx.author.id, 0) == 2:
@@ -863,6 +871,7 @@ class Waifu(PokestarBotCog):
             fields = [("Waifu Bracket", str(bracket_id)), ("Bracket Division", str(division)), ("Waifu ID", str(waifu_id)), ("Waifu Name", name)]
             messages = await send_embeds_fields(ctx, embed, fields)
             msg = messages[0]
+            await self.bot.reaction_router.register(msg, self.name)
             await msg.add_reaction("✅")
             if self.guide_data.get(ctx.author.id, 0) == 3:
                 await self.guide_step_4(ctx)
@@ -960,12 +969,14 @@ class Waifu(PokestarBotCog):
                                                  description="You have never participated in the waifu war. Click the emoji below to get started on "
                                                              "the guide.",
                                                  color=discord.Color.red()))
+                await self.bot.reaction_router.register(msg, self.name)
                 await msg.add_reaction("✅")
             else:
                 embed = Embed(ctx, title="Previous Division")
                 embed.add_field(name="Waifu Bracket", value=str(bracket_id))
                 embed.add_field(name="Waifu Division", value=str(data))
                 msg = await ctx.send(embed=embed)
+                await self.bot.reaction_router.register(msg, self.name)
                 await msg.add_reaction("✅")
 
     @waifu_war.command(brief="Start the next bracket", usage="additional", aliases=["start_next", "startnext", "sn", "finishbracket", "fb"])
@@ -1057,6 +1068,7 @@ class Waifu(PokestarBotCog):
             embed.add_field(name="Note",
                             value="If you have previously used the Waifu War system, the guide *will* delete the entry for the first division.")
             msg = await ctx.send(embed=embed)
+            await self.bot.reaction_router.register(msg, self.name)
             await msg.add_reaction("✅")
 
     @waifu_war.command(brief="See which divisions a person did not vote for.", usage="user", aliases=["misseddivisions", "md"], significant=True)
@@ -1115,6 +1127,7 @@ class Waifu(PokestarBotCog):
             msg = await ctx.send(embed=Embed(ctx, title="Start Voting",
                                              description=f"In order to vote, type `%ww d 1` in the {chan.mention} channel. Or, click the check mark "
                                                          f"below this item, and then go to {chan.mention}."))
+            await self.bot.reaction_router.register(msg, self.name)
             await msg.add_reaction("✅")
 
     @waifu_war.command(brief="See all waifus in the global list of waifus.",
@@ -1149,6 +1162,7 @@ class Waifu(PokestarBotCog):
                                   "bring up the first division, try typing `%ww d 1`.")
         embed.add_field(name="Note", value="For the purposes of the guide, clicking the check mark below will do the same thing as typing `%ww d 1`.")
         msg = await ctx.send(embed=embed)
+        await self.bot.reaction_router.register(msg, self.name)
         await msg.add_reaction("✅")
 
     async def guide_step_2(self, ctx: discord.ext.commands.Context):
@@ -1199,7 +1213,7 @@ class Waifu(PokestarBotCog):
                                                "check mark, which will open up the next division. Now go out there and vote for your waifu!"))
         del self.guide_data[ctx.author.id]
 
-    async def on_reaction(self, msg: discord.Message, emoji: Union[discord.PartialEmoji, discord.Emoji], user: discord.Member):
+    async def on_reaction(self, msg: discord.Message, emoji: Union[discord.PartialEmoji, discord.Emoji], user: discord.Member, _data: Optional[str]):
         if user.id == self.bot.user.id or user.bot or msg.author.id != self.bot.user.id:
             return
         embed: discord.Embed = msg.embeds[0]
@@ -1264,17 +1278,6 @@ class Waifu(PokestarBotCog):
                 ctx.channel = chan
                 return await self.division(ctx, 1)
 
-    @discord.ext.commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
-        if payload.user_id == self.bot.user.id:
-            return
-        channel: discord.TextChannel = self.bot.get_channel(payload.channel_id)
-        message: discord.Message = await channel.fetch_message(payload.message_id)
-        guild: discord.Guild = self.bot.get_guild(payload.guild_id)
-        user: discord.Member = guild.get_member(payload.user_id)
-        emoji = payload.emoji
-        await self.on_reaction(message, emoji, user)
-
 
 def setup(bot: "PokestarBot"):
     cog = Waifu(bot)
@@ -1,13 +1,25 @@
 from .async_enumerate import aenumerate
+from .bloom_filter import BloomFilter
 from .bounded_list import BoundedDict, BoundedList
+from .comment_ancestry import CommentAncestry
+from .command_metrics import CallStats, CommandMetrics
 from .conforming_iterator import ConformingIterator
 from .custom_author_context import CustomContext
+from .delivery_queue import Delivery, DeliveryQueue
 from .embed import Embed
-from .log_config import ShutdownStatusFilter, UserChannelFormatter
+from .log_config import JSONLinesFormatter, LogContext, ShutdownStatusFilter, UserChannelFormatter, log_context
+from .log_index import LogIndex
+from .log_reader import LogEntry, tail_log
+from .log_queue import BoundedQueueHandler
+from .loop_monitor import LoopMonitor
 from .nodes import BotNode, CogNode, CommandNode, CommentNode, GroupNode, SubmissionNode
 from .number import StaticNumber, Sum
 from .parse_code_block import parse_discord_code_block
+from .rate_budget import RateBudget
+from .reaction_router import ReactionRouter
+from .reddit_info_batcher import RedditInfoBatcher
 from .reddit_item_stash import RedditItemStash
+from .refreshing_cache import RefreshingCache
 from .reloading_client import ReloadingClient
 from .send_embeds import send_embeds, send_embeds_fields
 from .soft_stop import StopCommand
@@ -15,3 +27,6 @@ from .sort_long_lines import break_into_groups
 from .get_key import get_key
 from .rgb_string_from_int import rgb_string_from_int
 from .significant_commands import SignificantCommand, SignificantGroup
+from .timing_histogram import TimingHistogram
+from .worker_pool import WorkerPool
+from .ttl_cache import TTLCache
@@ -0,0 +1,39 @@
+import hashlib
+import math
+from typing import Iterable, Iterator
+
+
+class BloomFilter:
+    """A fixed-size set membership filter. Checks never give false negatives, and give false positives at about ``error_rate`` once
+    ``capacity`` keys have been added, so a hit has to be confirmed by the source of truth while a miss does not."""
+    __slots__ = ("capacity", "error_rate", "size", "hashes", "bits", "count")
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001, keys: Iterable[str] = ()):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        for key in keys:
+            self.add(key)
+
+    def positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + num * second) % self.size for num in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return "<{} capacity={} error_rate={} bits={} hashes={} count={}>".format(type(self).__name__, self.capacity, self.error_rate, self.size,
+                                                                                 self.hashes, self.count)
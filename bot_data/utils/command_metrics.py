@@ -0,0 +1,147 @@
+import logging
+import time
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import aiohttp.web
+import discord.ext.commands
+import discord.http
+
+from .timing_histogram import TimingHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class CallStats:
+    __slots__ = ("calls", "errors", "latency")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.calls = 0
+        self.errors = 0
+        self.latency = TimingHistogram(buckets)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} calls={self.calls} errors={self.errors} latency={self.latency!r}>"
+
+
+class CommandMetrics:
+    """Counts and times every command invocation, tagged by cog, and every Discord REST request, by route.
+
+    The command listeners are added to the bot in place of overriding its event methods, so that calling ``on_command_error`` directly does
+    not count an error. The metrics can also be served in the Prometheus text format, along with any extra histograms (such as the loop
+    lag)."""
+    COMMAND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    REST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    PREFIX = "pokestarbot_"
+
+    def __init__(self, histograms: Optional[Mapping[str, TimingHistogram]] = None):
+        self.commands: Dict[Tuple[str, str], CallStats] = {}  # (Cog name, command name) -> stats
+        self.routes: Dict[Tuple[str, str], CallStats] = {}  # (HTTP method, route path) -> stats
+        self.histograms = histograms or {}
+        self.runner: Optional[aiohttp.web.AppRunner] = None
+
+    def install(self, bot: discord.ext.commands.Bot):
+        bot.add_listener(self.on_command)
+        bot.add_listener(self.on_command_completion)
+        bot.add_listener(self.on_command_error)
+        http: discord.http.HTTPClient = bot.http
+        original_request = http.request
+
+        async def request(route: discord.http.Route, **kwargs):
+            if (stats := self.routes.get(key := (route.method, route.path))) is None:
+                stats = self.routes[key] = CallStats(self.REST_BUCKETS)
+            stats.calls += 1
+            start = time.perf_counter()
+            try:
+                return await original_request(route, **kwargs)
+            except discord.HTTPException:
+                stats.errors += 1
+                raise
+            finally:
+                stats.latency.observe(time.perf_counter() - start)
+
+        http.request = request
+
+    def stats(self, ctx: discord.ext.commands.Context) -> CallStats:
+        key = (ctx.cog.qualified_name if ctx.cog else "No Category", ctx.command.qualified_name)
+        if (stats := self.commands.get(key)) is None:
+            stats = self.commands[key] = CallStats(self.COMMAND_BUCKETS)
+        return stats
+
+    async def on_command(self, ctx: discord.ext.commands.Context):
+        ctx.metrics_started = time.perf_counter()
+        self.stats(ctx).calls += 1
+
+    async def on_command_completion(self, ctx: discord.ext.commands.Context):
+        self.finish(ctx)
+
+    async def on_command_error(self, ctx: discord.ext.commands.Context, _exception: BaseException):
+        if ctx.command is None or not hasattr(ctx, "metrics_started"):
+            return
+        self.stats(ctx).errors += 1
+        self.finish(ctx)
+
+    def finish(self, ctx: discord.ext.commands.Context):
+        if (started := getattr(ctx, "metrics_started", None)) is not None:
+            self.stats(ctx).latency.observe(time.perf_counter() - started)
+            ctx.metrics_started = None
+
+    @staticmethod
+    def top(stats: Dict[Tuple[str, str], CallStats], count: int = 10) -> List[Tuple[Tuple[str, str], CallStats]]:
+        return sorted(stats.items(), key=lambda item: item[1].calls, reverse=True)[:count]
+
+    @staticmethod
+    def labels(**labels: str) -> str:
+        return ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in
+                        labels.items())
+
+    @staticmethod
+    def histogram_lines(name: str, histogram: TimingHistogram, labels: str = "") -> List[str]:
+        lines = []
+        cumulative = 0
+        prefix = labels + "," if labels else ""
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.extend([f"{name}_sum{suffix} {histogram.total}", f"{name}_count{suffix} {histogram.count}"])
+        return lines
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for kind, stats, label_names in (("command", self.commands, ("cog", "command")), ("rest", self.routes, ("method", "route"))):
+            calls, errors, latency = self.PREFIX + kind + "_calls_total", self.PREFIX + kind + "_errors_total", self.PREFIX + kind + "_seconds"
+            lines.extend([f"# TYPE {calls} counter", f"# TYPE {errors} counter", f"# TYPE {latency} histogram"])
+            for key, call_stats in stats.items():
+                labels = self.labels(**dict(zip(label_names, key)))
+                lines.extend([f"{calls}{{{labels}}} {call_stats.calls}", f"{errors}{{{labels}}} {call_stats.errors}"])
+                lines.extend(self.histogram_lines(latency, call_stats.latency, labels))
+        for name, histogram in self.histograms.items():
+            lines.append(f"# TYPE {self.PREFIX + name} histogram")
+            lines.extend(self.histogram_lines(self.PREFIX + name, histogram))
+        return "\n".join(lines) + "\n"
+
+    async def metrics_endpoint(self, _request: aiohttp.web.Request) -> aiohttp.web.Response:
+        return aiohttp.web.Response(text=self.render_prometheus(), content_type="text/plain")
+
+    async def serve(self, host: str, port: int):
+        if self.runner is not None:
+            return
+        app = aiohttp.web.Application()
+        app.add_routes([aiohttp.web.get("/metrics", self.metrics_endpoint)])
+        self.runner = aiohttp.web.AppRunner(app)
+        await self.runner.setup()
+        await aiohttp.web.TCPSite(self.runner, host, port).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def __repr__(self) -> str:
+        return "<{} commands={} routes={} serving={}>".format(type(self).__name__, len(self.commands), len(self.routes), self.runner is not None)
@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional
+
+import asyncpraw
+import asyncpraw.exceptions
+import asyncpraw.models
+
+
+class CommentAncestry:
+    """Builds comment chains for a single submission from an index of its comments.
+
+    Each load asks Reddit for a comment together with up to ``CONTEXT`` of its ancestors (Reddit clamps the context to 8), plus its replies,
+    and indexes every comment in the response by fullname. Chains are then built by following ``parent_id`` through the index, so a chain
+    costs one request for every nine levels rather than one per level, and comments already indexed are never requested again."""
+    CONTEXT = 8
+
+    def __init__(self, reddit: asyncpraw.Reddit, submission_id: str):
+        self.reddit = reddit
+        self.submission_id = submission_id
+        self.submission: Optional[asyncpraw.models.Submission] = None
+        self.comments: Dict[str, asyncpraw.models.Comment] = {}
+        self.requests = 0
+
+    async def load(self, comment_id: str):
+        self.requests += 1
+        submission_listing, comment_listing = await self.reddit.get(f"comments/{self.submission_id}/_/{comment_id}",
+                                                                    params={"context": self.CONTEXT})
+        if self.submission is None:
+            self.submission = submission_listing.children[0]
+        queue = []
+        for comment in comment_listing.children:
+            if isinstance(comment, asyncpraw.models.Comment):
+                comment.submission = self.submission
+                queue.append(comment)
+        while queue:
+            comment = queue.pop()
+            self.comments.setdefault(comment.fullname, comment)
+            queue.extend(reply for reply in comment.replies if isinstance(reply, asyncpraw.models.Comment))
+
+    async def get(self, fullname: str) -> asyncpraw.models.Comment:
+        if fullname not in self.comments:
+            await self.load(fullname.partition("_")[2])
+        try:
+            return self.comments[fullname]
+        except KeyError:
+            raise asyncpraw.exceptions.ClientException(f"Comment {fullname} does not exist in submission {self.submission_id}.") from None
+
+    async def chain(self, comment_id: str, top_id: Optional[str] = None) -> List[asyncpraw.models.Comment]:
+        """Return the comments from ``top_id`` (or the top-level comment if not provided) down to ``comment_id``, both included."""
+        comment = await self.get("t1_" + comment_id)
+        chain = [comment]
+        while comment.id != top_id and comment.parent_id != self.submission.fullname:
+            comment = await self.get(comment.parent_id)
+            chain.append(comment)
+        if top_id is not None and comment.id != top_id:
+            raise asyncpraw.exceptions.ClientException(f"Comment t1_{top_id} is not an ancestor of comment t1_{comment_id}.")
+        chain.reverse()
+        return chain
@@ -0,0 +1,118 @@
+import asyncio
+import copy
+import datetime
+import logging
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import discord
+
+from .rate_budget import RateBudget
+from .send_embeds import send_embeds_fields
+from ..const import bot_version
+
+logger = logging.getLogger(__name__)
+
+
+class Delivery(NamedTuple):
+    embed: discord.Embed
+    fields: List[Tuple[str, str]]
+    reactions: Sequence[str]
+    summary: str  # A single line used when the delivery is folded into a digest
+    data: Optional[str] = None  # Registered with the sent message for the reaction router
+
+
+class DeliveryQueue:
+    """Delivers embeds to a single channel in order, pacing sends to the channel's message bucket (5 messages every 5 seconds).
+
+    Reactions are added concurrently in the background so that they do not hold up the next send. When at least ``digest_threshold``
+    deliveries are waiting, they are folded into compact digest embeds with one numbered line per delivery instead, at most ten to a page.
+    ``on_send`` is awaited with every message sent for a single delivery, before its reactions are added, and ``on_digest`` with every digest
+    page and the deliveries it lists, before the page gets one number reaction per line. A delivery that fails to send is logged and skipped,
+    without holding up the rest of the batch."""
+    DESCRIPTION_LIMIT = 2048
+    DIGEST_REACTIONS = ("1\ufe0f\u20e3", "2\ufe0f\u20e3", "3\ufe0f\u20e3", "4\ufe0f\u20e3", "5\ufe0f\u20e3", "6\ufe0f\u20e3", "7\ufe0f\u20e3",
+                        "8\ufe0f\u20e3", "9\ufe0f\u20e3", "\U0001f51f")  # Keycaps 1 to 10
+
+    def __init__(self, channel: discord.TextChannel, digest_title: str, digest_threshold: int = 5, rate: int = 5, per: float = 5,
+                 on_send: Optional[Callable[[discord.Message, Delivery], Awaitable[Any]]] = None,
+                 on_digest: Optional[Callable[[discord.Message, List[Delivery]], Awaitable[Any]]] = None):
+        self.channel = channel
+        self.on_send = on_send
+        self.on_digest = on_digest
+        self.digest_title = digest_title
+        self.digest_threshold = digest_threshold
+        self.budget = RateBudget(rate=rate, per=per, concurrency=1)
+        self.queue: "asyncio.Queue[Delivery]" = asyncio.Queue()
+        self.worker: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.digested = 0
+
+    def put(self, delivery: Delivery):
+        self.queue.put_nowait(delivery)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.ensure_future(self.run())
+
+    def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    async def run(self):
+        while not self.queue.empty():
+            batch = [self.queue.get_nowait() for _ in range(self.queue.qsize())]
+            if len(batch) >= self.digest_threshold:
+                await self.send_digest(batch)
+                continue
+            for delivery in batch:
+                try:
+                    await self.send(delivery)
+                except Exception:
+                    logger.warning("Unable to deliver %s to channel %s", delivery.data or delivery.summary, self.channel, exc_info=True)
+
+    async def send(self, delivery: Delivery):
+        async with self.budget:
+            msg = (await send_embeds_fields(self.channel, copy.deepcopy(delivery.embed), list(delivery.fields)))[0]
+        self.sent += 1
+        if self.on_send is not None:
+            await self.on_send(msg, delivery)
+        if delivery.reactions:
+            asyncio.ensure_future(self.add_reactions(msg, delivery.reactions))
+
+    @staticmethod
+    async def add_reactions(msg: discord.Message, reactions: Sequence[str]):
+        results = await asyncio.gather(*[msg.add_reaction(reaction) for reaction in reactions], return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Unable to add reaction to message %s", msg.id, exc_info=result)
+
+    def digest_line(self, num: int, delivery: Delivery) -> str:
+        return f"{self.DIGEST_REACTIONS[num - 1]} {delivery.summary}"
+
+    async def send_digest(self, batch: List[Delivery]):
+        pages: List[List[Delivery]] = [[]]
+        length = 0
+        for delivery in batch:
+            if len(pages[-1]) == len(self.DIGEST_REACTIONS) or length + len(self.digest_line(len(pages[-1]) + 1, delivery)) + 1 > \
+                    self.DESCRIPTION_LIMIT:
+                pages.append([])
+                length = 0
+            pages[-1].append(delivery)
+            length += len(self.digest_line(len(pages[-1]), delivery)) + 1
+        for num, page in enumerate(pages, start=1):
+            title = f"{self.digest_title} ({len(batch)} Items)" + (f" [{num}/{len(pages)}]" if len(pages) > 1 else "")
+            embed = discord.Embed(title=title, description="\n".join(self.digest_line(line, delivery) for line, delivery in enumerate(page, start=1)),
+                                  timestamp=datetime.datetime.utcnow())
+            embed.set_footer(text=f"PokestarBot Version {bot_version}")
+            try:
+                async with self.budget:
+                    msg = await self.channel.send(embed=embed)
+                if self.on_digest is not None:
+                    await self.on_digest(msg, page)
+            except Exception:
+                logger.warning("Unable to deliver a digest page of %s items to channel %s", len(page), self.channel, exc_info=True)
+                continue
+            self.digested += len(page)
+            asyncio.ensure_future(self.add_reactions(msg, self.DIGEST_REACTIONS[:len(page)]))
+
+    def __repr__(self) -> str:
+        return "<{} channel={} pending={} sent={} digested={}>".format(type(self).__name__, self.channel, self.queue.qsize(), self.sent,
+                                                                      self.digested)
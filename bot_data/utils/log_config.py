@@ -1,41 +1,76 @@
-import inspect
+import contextvars
+import json
 import logging
-from typing import Union
+from typing import NamedTuple, Optional, Tuple, Union
 
 import discord.ext.commands
 
 logger = logging.getLogger(__name__)
 
 
+class LogContext(NamedTuple):
+    user: Optional[Union[discord.User, discord.Member]] = None
+    channel: Optional[discord.abc.Messageable] = None
+    command: Optional[discord.ext.commands.Command] = None
+    messageid: Optional[int] = None
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> "LogContext":
+        return cls(message.author, message.channel, None, message.id)
+
+    @classmethod
+    def from_context(cls, ctx: discord.ext.commands.Context) -> "LogContext":
+        return cls(ctx.author, ctx.channel, ctx.command, ctx.message.id)
+
+    def ids(self) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """The user, guild and channel IDs."""
+        return getattr(self.user, "id", None), getattr(getattr(self.channel, "guild", None), "id", None), getattr(self.channel, "id", None)
+
+
+# Set once per message, command invocation or reaction. Tasks copy the context when they are created, so everything a handler starts inherits it.
+log_context: "contextvars.ContextVar[LogContext]" = contextvars.ContextVar("log_context", default=LogContext())
+
+
 class UserChannelFormatter(logging.Formatter):
     def __init__(self):
         super().__init__("[%(asctime)s] {%(module)s::%(funcName)s} {%(user)s::%(channel)s::%(command)s::%(messageid)s} (%(levelname)s): %(message)s")
 
     def format(self, record: logging.LogRecord) -> str:
-        frame = inspect.currentframe()
-        user = channel = command = messageid = msg = None
-        while frame.f_back is not None:
-            for key, value in frame.f_locals.items():
-                if isinstance(value, discord.ext.commands.Context):
-                    user = value.author
-                    channel = value.channel
-                    command = value.command
-                    messageid = value.message.id
-                    break
-                elif isinstance(value, discord.Message):
-                    msg = value
-            frame = frame.f_back
-        if msg and not command:
-            user = msg.author
-            channel = msg.channel
-            messageid = msg.id
-        record.user = user
-        record.channel = channel
-        record.command = command
-        record.messageid = messageid
+        if not hasattr(record, "messageid"):
+            record.user, record.channel, record.command, record.messageid = log_context.get()
         return super().format(record)
 
 
+class JSONLinesFormatter(logging.Formatter):
+    """Formats each record as a single-line JSON object, carrying the same request context as :class:`UserChannelFormatter` plus the user,
+    guild and channel IDs, so that the log can be indexed and queried."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "messageid"):
+            record.user, record.channel, record.command, record.messageid = log_context.get()
+        if not hasattr(record, "user_id"):
+            record.user_id, record.guild_id, record.channel_id = log_context.get().ids()
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            message += "\n" + record.exc_text
+        return json.dumps({"time"      : record.created,
+                           "timestamp" : self.formatTime(record),
+                           "level"     : record.levelname,
+                           "logger"    : record.name,
+                           "module"    : record.module,
+                           "function"  : record.funcName,
+                           "message"   : message,
+                           "user"      : None if record.user is None else str(record.user),
+                           "channel"   : None if record.channel is None else str(record.channel),
+                           "command"   : None if record.command is None else str(record.command),
+                           "message_id": None if record.messageid is None else int(record.messageid),
+                           "user_id"   : record.user_id,
+                           "guild_id"  : record.guild_id,
+                           "channel_id": record.channel_id}, ensure_ascii=False)
+
+
 class ShutdownStatusFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> Union[bool, int]:
         """Filters out the bot shutdown messages, which are not unexpected behavior."""
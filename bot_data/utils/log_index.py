@@ -0,0 +1,104 @@
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from .log_reader import LEVELS, log_files
+
+logger = logging.getLogger(__name__)
+
+
+class LogIndex:
+    """An incremental index of the JSON-lines log, kept in a SQLite database next to the log files.
+
+    Each log file is tracked by its inode (which survives the midnight rotation) and the offset up to which it has been indexed, so every
+    query only parses what was appended since the last one. Entries are indexed by time, level, command, user and guild, and the matching
+    lines are read back by seeking to their offsets, so a query never reads a whole file."""
+
+    def __init__(self, base: str, name: str = "bot.jsonl"):
+        self.base = base
+        self.name = name
+        self.path = os.path.join(base, name + ".index.db")
+        self.lock = threading.Lock()  # Queries run in worker threads; only one of them should index at a time
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.executescript(
+            """CREATE TABLE IF NOT EXISTS LOG_FILES(INODE INTEGER PRIMARY KEY, PATH TEXT NOT NULL, INDEXED INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS LOG_ENTRIES(INODE INTEGER NOT NULL, OFFSET INTEGER NOT NULL, TIME REAL NOT NULL, LEVEL INTEGER NOT NULL,
+            COMMAND TEXT, USER_ID BIGINT, GUILD_ID BIGINT, PRIMARY KEY (INODE, OFFSET)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS LOG_ENTRIES_TIME ON LOG_ENTRIES(TIME);
+            CREATE INDEX IF NOT EXISTS LOG_ENTRIES_COMMAND ON LOG_ENTRIES(COMMAND, TIME);
+            CREATE INDEX IF NOT EXISTS LOG_ENTRIES_USER ON LOG_ENTRIES(USER_ID, TIME);
+            CREATE INDEX IF NOT EXISTS LOG_ENTRIES_GUILD ON LOG_ENTRIES(GUILD_ID, TIME);""")
+        return conn
+
+    def update(self, conn: sqlite3.Connection) -> int:
+        """Index everything appended to the log files since the last update, and drop the entries of files that no longer exist. Returns the
+        number of newly indexed entries."""
+        files = {os.stat(path).st_ino: path for path in log_files(self.base, self.name)}
+        known = {inode: indexed for inode, indexed in conn.execute("""SELECT INODE, INDEXED FROM LOG_FILES""")}
+        for inode in known.keys() - files.keys():
+            conn.execute("""DELETE FROM LOG_ENTRIES WHERE INODE==?""", [inode])
+            conn.execute("""DELETE FROM LOG_FILES WHERE INODE==?""", [inode])
+        added = 0
+        for inode, path in files.items():
+            indexed = known.get(inode, 0)
+            if indexed > os.path.getsize(path):  # Truncated, or a reused inode
+                conn.execute("""DELETE FROM LOG_ENTRIES WHERE INODE==?""", [inode])
+                indexed = 0
+            rows = []
+            with open(path, "rb") as file:
+                file.seek(indexed)
+                for line in file:
+                    if not line.endswith(b"\n"):  # Still being written
+                        break
+                    offset, indexed = indexed, indexed + len(line)
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping malformed log line at %s:%s", path, offset)
+                        continue
+                    command = entry.get("command")
+                    rows.append([inode, offset, entry["time"], LEVELS.get(entry["level"], 0), command.lower() if command else None,
+                                 entry.get("user_id"), entry.get("guild_id")])
+            conn.executemany("""INSERT OR REPLACE INTO LOG_ENTRIES(INODE, OFFSET, TIME, LEVEL, COMMAND, USER_ID, GUILD_ID) VALUES (?, ?, ?, ?, ?, ?,
+            ?)""", rows)
+            conn.execute("""INSERT OR REPLACE INTO LOG_FILES(INODE, PATH, INDEXED) VALUES (?, ?, ?)""", [inode, path, indexed])
+            added += len(rows)
+        conn.commit()
+        return added
+
+    def query(self, number: int = 20, level: Optional[str] = None, command: Optional[str] = None, user_id: Optional[int] = None,
+              guild_id: Optional[int] = None, since: Optional[datetime.datetime] = None, until: Optional[datetime.datetime] = None) -> List[
+        Dict[str, Any]]:
+        """Return the newest ``number`` entries, oldest first, matching all of the given filters, after bringing the index up to date."""
+        clauses, params = [], []
+        for clause, value in (("LEVEL>=?", LEVELS[level.upper()] if level else None), ("COMMAND==?", command.lower() if command else None),
+                              ("USER_ID==?", user_id), ("GUILD_ID==?", guild_id), ("TIME>=?", since.timestamp() if since else None),
+                              ("TIME<=?", until.timestamp() if until else None)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        with self.lock:
+            conn = self.connect()
+            try:
+                if added := self.update(conn):
+                    logger.debug("Indexed %s new log entries", added)
+                rows = conn.execute(f"""SELECT LOG_FILES.PATH, LOG_ENTRIES.OFFSET FROM LOG_ENTRIES INNER JOIN LOG_FILES ON LOG_ENTRIES.INODE ==
+                LOG_FILES.INODE {where} ORDER BY TIME DESC LIMIT ?""", params + [number]).fetchall()
+            finally:
+                conn.close()
+        entries = []
+        for path, offset in reversed(rows):
+            with open(path, "rb") as file:
+                file.seek(offset)
+                entries.append(json.loads(file.readline()))
+        return entries
+
+    def __repr__(self) -> str:
+        return "<{} path={!r}>".format(type(self).__name__, self.path)
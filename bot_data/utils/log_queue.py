@@ -0,0 +1,52 @@
+import logging
+import logging.handlers
+import queue
+
+from .log_config import log_context
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Hands log records to a bounded queue, which a :class:`logging.handlers.QueueListener` drains into the real handlers from a background
+    thread, so that disk writes and rotation never block the event loop.
+
+    Records are prepared in the logging thread: the message is merged with its arguments, the traceback is rendered and the request context
+    is stamped onto the record, since none of these can be recovered later in the writer thread. The final formatting is left to the real
+    handlers' formatters. When the queue is full, records are dropped and counted, and the count is logged as soon as there is room again."""
+
+    def __init__(self, maxsize: int = 10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self.unreported = 0  # Dropped records that have not been reported yet; only changed in emit, which holds the handler lock
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not hasattr(record, "messageid"):
+            context = log_context.get()
+            record.user, record.channel, record.command, record.messageid = (None if value is None else str(value) for value in context)
+            record.user_id, record.guild_id, record.channel_id = context.ids()
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self.unreported += 1
+            return
+        if self.unreported:
+            unreported, self.unreported = self.unreported, 0
+            report = logging.makeLogRecord({"name": __name__, "levelno": logging.WARNING, "levelname": "WARNING", "module": "log_queue",
+                                            "funcName": "enqueue", "msg": f"Dropped {unreported} log records because the log queue was full."})
+            try:
+                self.queue.put_nowait(self.prepare(report))
+            except queue.Full:
+                self.unreported += unreported
+
+    def __repr__(self) -> str:
+        return "<{} level={} pending={} dropped={}>".format(type(self).__name__, logging.getLevelName(self.level), self.queue.qsize(),
+                                                           self.dropped)
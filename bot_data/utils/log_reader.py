@@ -0,0 +1,86 @@
+import datetime
+import logging
+import os
+import re
+from typing import Iterator, List, NamedTuple, Optional
+
+from ..const import log_entry, log_levels
+
+logger = logging.getLogger(__name__)
+
+LEVELS = {name: getattr(logging, name) for name in log_levels}
+ROTATED_SUFFIX = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class LogEntry(NamedTuple):
+    timestamp: datetime.datetime
+    module: str
+    level: str
+    text: str  # The whole entry, including continuation lines such as tracebacks
+
+
+def reverse_lines(path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """Yield the lines of a file from last to first, reading it backwards from the end one block at a time."""
+    with open(path, "rb") as file:
+        position = file.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            file.seek(position)
+            lines = (file.read(size) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode("utf-8", errors="replace").rstrip("\r")
+        yield remainder.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def reverse_entries(path: str) -> Iterator[LogEntry]:
+    """Yield the entries of a log file from newest to oldest."""
+    continuation = []
+    for line in reverse_lines(path):
+        if match := log_entry.match(line):
+            continuation.append(line)
+            timestamp, module, level = match.groups()
+            yield LogEntry(datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S"), module, level, "\n".join(reversed(continuation)).rstrip())
+            continuation = []
+        else:
+            continuation.append(line)
+
+
+def log_files(base: str, name: str = "bot.log") -> List[str]:
+    """The current log file and the files rotated from it at midnight (suffixed with their date), newest first."""
+    rotated = sorted((file for file in os.listdir(base) if file.startswith(name + ".") and ROTATED_SUFFIX.match(file[len(name) + 1:])),
+                     reverse=True)
+    return [os.path.join(base, file) for file in [name] + rotated if os.path.exists(os.path.join(base, file))]
+
+
+def file_date(path: str) -> Optional[datetime.date]:
+    suffix = path.rpartition(".")[2]
+    return datetime.datetime.strptime(suffix, "%Y-%m-%d").date() if ROTATED_SUFFIX.match(suffix) else None
+
+
+def tail_log(base: str, number: int = 20, level: Optional[str] = None, module: Optional[str] = None, since: Optional[datetime.datetime] = None,
+         until: Optional[datetime.datetime] = None) -> List[LogEntry]:
+    """Return the newest ``number`` entries, oldest first, that are at least ``level``, were logged from ``module`` and fall within the time
+    range. Files are read backwards from their ends, so only the requested tail (and whatever the filters skip over) is ever read; rotated files
+    outside of the time range are not opened at all."""
+    minimum = LEVELS[level.upper()] if level else 0
+    module = module.lower() if module else None
+    entries = []
+    for path in log_files(base):
+        if (date := file_date(path)) is not None:  # Files rotate at UTC midnight, while entries are stamped in local time
+            if until is not None and date > until.date() + datetime.timedelta(days=1):
+                continue
+            if since is not None and date < since.date() - datetime.timedelta(days=1):
+                break
+        for entry in reverse_entries(path):
+            if until is not None and entry.timestamp > until:
+                continue
+            if since is not None and entry.timestamp < since:
+                return list(reversed(entries))
+            if LEVELS[entry.level] >= minimum and (module is None or entry.module.lower() == module):
+                entries.append(entry)
+                if len(entries) == number:
+                    return list(reversed(entries))
+    return list(reversed(entries))
@@ -0,0 +1,111 @@
+import asyncio
+import functools
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .timing_histogram import TimingHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measures how long the event loop is blocked, and by what.
+
+    A sampler task sleeps for ``interval`` seconds at a time and records how late it wakes up (the timer drift). Every callback the loop runs
+    is timed, and callbacks that run for at least ``threshold`` seconds are logged and recorded by name (the coroutine's qualified name for
+    task steps). Every ``report_interval`` seconds, a summary naming the worst callbacks of that period is logged. At most ``MAX_NAMES``
+    names are kept; slow callbacks beyond that are recorded under ``OTHER``."""
+    SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    MAX_NAMES = 200
+    OTHER = "<other>"
+
+    def __init__(self, interval: float = 1, threshold: float = 0.1, report_interval: float = 900):
+        self.interval = interval
+        self.threshold = threshold
+        self.report_interval = report_interval
+        self.lag = TimingHistogram()
+        self.slow: Dict[str, TimingHistogram] = {}
+        self.period: Dict[str, TimingHistogram] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.original_run: Optional[Callable[[asyncio.Handle], None]] = None
+
+    @staticmethod
+    def describe(handle: asyncio.Handle) -> str:
+        """Name the callback. For task steps, this is the chain of coroutines the task is suspended in after the step (the innermost three),
+        since the code that blocked ran right before that suspension point, prefixed by the task's name if it was given one. Names never
+        contain addresses, so that every call of the same callback is recorded under the same name."""
+        callback = handle._callback
+        while isinstance(callback, functools.partial):
+            callback = callback.func
+        # Task steps and the wakeup wrappers that resume a task after a future (a C type on Python 3.8) are both bound to the task
+        if not isinstance(task := getattr(callback, "__self__", None), asyncio.Task):
+            return getattr(callback, "__qualname__", None) or type(callback).__qualname__
+        names = []
+        awaitable = task.get_coro()
+        while awaitable is not None and (name := getattr(awaitable, "__qualname__", None)):
+            names.append(name)
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        chain = " > ".join(names[-3:]) or type(task.get_coro()).__qualname__
+        return chain if (task_name := task.get_name()).startswith("Task-") else f"{task_name}: {chain}"
+
+    def install(self):
+        if self.original_run is not None:
+            return
+        self.original_run = original_run = asyncio.Handle._run
+        monitor = self
+
+        def _run(handle: asyncio.Handle):
+            start = time.perf_counter()
+            original_run(handle)
+            if (elapsed := time.perf_counter() - start) >= monitor.threshold:
+                monitor.record(handle, elapsed)
+
+        asyncio.Handle._run = _run
+
+    def uninstall(self):
+        if self.original_run is not None:
+            asyncio.Handle._run = self.original_run
+            self.original_run = None
+
+    def record(self, handle: asyncio.Handle, elapsed: float):
+        if (name := self.describe(handle)) not in self.slow and len(self.slow) >= self.MAX_NAMES:
+            name = self.OTHER
+        self.slow.setdefault(name, TimingHistogram(self.SLOW_BUCKETS)).observe(elapsed)
+        self.period.setdefault(name, TimingHistogram(self.SLOW_BUCKETS)).observe(elapsed)
+        logger.warning("Slow callback %s blocked the event loop for %.3f seconds", name, elapsed)
+
+    def start(self):
+        self.install()
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.sample())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.uninstall()
+
+    async def sample(self):
+        reported = time.monotonic()
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag.observe(max(now - start - self.interval, 0.0))
+            if now - reported >= self.report_interval:
+                reported = now
+                self.report()
+
+    @staticmethod
+    def worst(histograms: Dict[str, TimingHistogram], count: int = 5) -> List[Tuple[str, TimingHistogram]]:
+        return sorted(histograms.items(), key=lambda item: item[1].total, reverse=True)[:count]
+
+    def report(self):
+        worst = ", ".join(f"{name} ({histogram.count}x, {histogram.total:.2f}s total, {histogram.max:.2f}s max)" for name, histogram in
+                          self.worst(self.period)) or "None"
+        logger.info("Event loop lag: mean %.2f ms, max %.2f ms over %s samples. Slowest callbacks: %s", self.lag.mean * 1000,
+                    self.lag.max * 1000, self.lag.count, worst)
+        self.period.clear()
+
+    def __repr__(self) -> str:
+        return "<{} installed={} lag={!r} slow_callbacks={}>".format(type(self).__name__, self.original_run is not None, self.lag, len(self.slow))
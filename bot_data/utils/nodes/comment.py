@@ -1,11 +1,11 @@
-from typing import Iterable, Optional, Union
+from typing import Iterable, List, Optional, Union
 
 import anytree
 import asyncpraw.models
 
 
 class CommentNode(anytree.NodeMixin):
-    __slots__ = ("comment", "parent", "_children", "full")
+    __slots__ = ("comment", "parent", "_children", "_lines", "full")
 
     CHILDREN_ATTR = "replies"
 
@@ -14,11 +14,14 @@ class CommentNode(anytree.NodeMixin):
         self.parent = parent
         self.full = full
         self._children = None
+        self._lines = None
 
     @property
     def children(self):
-        return self._children or [CommentNode(comment, self) for comment in getattr(self.comment, self.CHILDREN_ATTR) if
-                                  isinstance(comment, asyncpraw.models.Comment)]
+        if self._children is None:
+            self._children = [CommentNode(comment, self) for comment in getattr(self.comment, self.CHILDREN_ATTR) if
+                              isinstance(comment, asyncpraw.models.Comment)]
+        return self._children
 
     @children.setter
     def children(self, new_children: Iterable[Union[asyncpraw.models.Comment, "CommentNode"]]):
@@ -27,8 +30,10 @@ class CommentNode(anytree.NodeMixin):
             child.parent = self
 
     @property
-    def lines(self):
-        return repr(self).splitlines(False)
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = repr(self).splitlines(False)
+        return self._lines
 
     def __repr__(self):
         text = self.comment.body.replace("\n\n", "\0").replace("\n", " ").replace("\0", "\n")
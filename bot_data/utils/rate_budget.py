@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+
+class RateBudget:
+    """A token bucket shared by concurrent pollers. Entering it waits for a free slot (at most ``concurrency`` holders at a time) and for a
+    token, which refill at ``rate`` tokens every ``per`` seconds."""
+
+    def __init__(self, rate: int = 60, per: float = 60, concurrency: int = 8):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.waited = 0.0
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            self.refill()
+            if self.tokens < 1:
+                delay = (1 - self.tokens) * self.per / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self.refill()
+            self.tokens -= 1
+
+    async def __aenter__(self) -> "RateBudget":
+        await self.semaphore.acquire()
+        try:
+            await self.acquire()
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.semaphore.release()
+
+    def __repr__(self) -> str:
+        return "<{} rate={}/{}s tokens={:.1f} waited={:.1f}s>".format(type(self).__name__, self.rate, self.per, self.tokens, self.waited)
@@ -0,0 +1,102 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, TYPE_CHECKING, Union
+
+import discord
+
+from .bounded_list import BoundedDict
+from .log_config import LogContext, log_context
+
+if TYPE_CHECKING:
+    from ..bot import PokestarBot
+
+logger = logging.getLogger(__name__)
+
+ReactionHandler = Callable[[discord.Message, Union[discord.PartialEmoji, discord.Emoji], discord.Member, Optional[str]], Awaitable[Any]]
+
+
+class Route(NamedTuple):
+    owner: str
+    data: Optional[str]  # Handed back to the owner's handler, e.g. the item that the message's buttons act on
+
+
+class ReactionRouter:
+    """Routes reactions on bot-posted messages to the handler of the cog that posted them.
+
+    Routes are kept in memory and persisted in the REACTION_ROUTES table, so buttons keep working across restarts and reactions on any other
+    message are dropped without a request. Registered messages are kept in a bounded cache, and a message is only fetched (once) after it has
+    been evicted or the bot has restarted."""
+
+    def __init__(self, bot: "PokestarBot", limit: int = 10000, cache_size: int = 500):
+        self.bot = bot
+        self.limit = limit
+        self.routes: Dict[int, Route] = {}  # Message ID -> Route, oldest message first
+        self.messages: Dict[int, discord.Message] = BoundedDict(bound=cache_size)
+        self.handlers: Dict[str, ReactionHandler] = {}
+        self.dispatched = 0
+        self.fetched = 0
+
+    @property
+    def conn(self):
+        return self.bot.conn
+
+    async def pre_create(self):
+        async with self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS REACTION_ROUTES(MESSAGE_ID BIGINT PRIMARY KEY, CHANNEL_ID BIGINT NOT NULL, OWNER TEXT NOT NULL,
+                DATA TEXT)"""):
+            pass
+
+    async def load(self):
+        async with self.conn.execute(
+                """DELETE FROM REACTION_ROUTES WHERE MESSAGE_ID NOT IN (SELECT MESSAGE_ID FROM REACTION_ROUTES ORDER BY MESSAGE_ID DESC LIMIT ?)""",
+                [self.limit]):
+            pass
+        async with self.conn.execute("""SELECT MESSAGE_ID, OWNER, DATA FROM REACTION_ROUTES ORDER BY MESSAGE_ID""") as cursor:
+            self.routes = {message_id: Route(owner, data) async for message_id, owner, data in cursor}
+        logger.info("Loaded %s reaction routes.", len(self.routes))
+
+    def add_handler(self, owner: str, handler: ReactionHandler):
+        self.handlers[owner] = handler
+
+    def remove_handler(self, owner: str):
+        self.handlers.pop(owner, None)
+
+    async def register(self, msg: discord.Message, owner: str, data: Optional[str] = None):
+        self.routes[msg.id] = Route(owner, data)
+        self.messages[msg.id] = msg
+        if len(self.routes) > self.limit:
+            del self.routes[next(iter(self.routes))]
+        async with self.conn.execute("""INSERT OR REPLACE INTO REACTION_ROUTES(MESSAGE_ID, CHANNEL_ID, OWNER, DATA) VALUES (?, ?, ?, ?)""",
+                                     [msg.id, msg.channel.id, owner, data]):
+            pass
+
+    async def forget(self, *message_ids: int):
+        message_ids = [message_id for message_id in message_ids if self.routes.pop(message_id, None) is not None]
+        for message_id in message_ids:
+            self.messages.pop(message_id, None)
+        if message_ids:
+            async with self.conn.executemany("""DELETE FROM REACTION_ROUTES WHERE MESSAGE_ID==?""", [[message_id] for message_id in message_ids]):
+                pass
+
+    async def dispatch(self, payload: discord.RawReactionActionEvent):
+        if payload.user_id == self.bot.user.id or (route := self.routes.get(payload.message_id)) is None:
+            return
+        if (handler := self.handlers.get(route.owner)) is None:
+            return logger.debug("No handler for %s, dropping reaction on message %s", route.owner, payload.message_id)
+        if (guild := self.bot.get_guild(payload.guild_id)) is None:
+            return
+        user: discord.Member = guild.get_member(payload.user_id)
+        channel: discord.TextChannel = self.bot.get_channel(payload.channel_id)
+        log_context.set(LogContext(user, channel, None, payload.message_id))
+        if (message := self.messages.get(payload.message_id)) is None:
+            try:
+                message = await channel.fetch_message(payload.message_id)
+            except discord.NotFound:
+                return await self.forget(payload.message_id)
+            self.fetched += 1
+            self.messages[message.id] = message
+        self.dispatched += 1
+        await handler(message, payload.emoji, user, route.data)
+
+    def __repr__(self) -> str:
+        return "<{} routes={} cached={} handlers={} dispatched={} fetched={}>".format(type(self).__name__, len(self.routes), len(self.messages),
+                                                                                     sorted(self.handlers), self.dispatched, self.fetched)
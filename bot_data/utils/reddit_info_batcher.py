@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Dict, Optional, TYPE_CHECKING, Union
+
+import asyncpraw.models
+
+if TYPE_CHECKING:
+    from ..bot import PokestarBot
+
+logger = logging.getLogger(__name__)
+
+RedditItem = Union[asyncpraw.models.Comment, asyncpraw.models.Submission, asyncpraw.models.Subreddit]
+
+
+class RedditInfoBatcher:
+    """Resolves fullnames through ``reddit.info``. Fullnames requested by any caller within ``window`` seconds of each other are sent together,
+    up to ``BATCH_SIZE`` per request, so a burst of lookups costs a handful of requests instead of one each."""
+    BATCH_SIZE = 100
+
+    def __init__(self, bot: "PokestarBot", window: float = 0.05):
+        self.bot = bot
+        self.window = window
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.requests = 0
+        self.resolved = 0
+
+    async def resolve(self, fullname: str) -> Optional[RedditItem]:
+        """Return the item with the given fullname, or None if Reddit does not know about it."""
+        loop = asyncio.get_running_loop()
+        if (future := self.pending.get(fullname)) is None:
+            future = self.pending[fullname] = loop.create_future()
+            if len(self.pending) >= self.BATCH_SIZE:
+                self.flush()
+            elif self.flush_handle is None:
+                self.flush_handle = loop.call_later(self.window, self.flush)
+        return await asyncio.shield(future)
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.pending = self.pending, {}
+        if batch:
+            asyncio.ensure_future(self.resolve_batch(batch))
+
+    async def resolve_batch(self, batch: Dict[str, asyncio.Future]):
+        self.requests += 1
+        self.resolved += len(batch)
+        logger.debug("Resolving %s fullnames in one request", len(batch))
+        found = {}
+        try:
+            async for item in self.bot.reddit.info(list(batch)):
+                found[item.fullname] = item
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for fullname, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(fullname))
+
+    def __repr__(self) -> str:
+        return "<{} window={} requests={} resolved={}>".format(type(self).__name__, self.window, self.requests, self.resolved)
@@ -1,85 +1,111 @@
+import collections
 import collections.abc
-from typing import Any, Iterator, Mapping, Optional, Tuple, Type, Union
+import itertools
+import timeit
+from typing import Any, Dict, Iterator, Mapping, Optional, Type, Union
 
 import asyncpraw.models
 
 from .bounded_list import BoundedDict, BoundedList
 
+RedditItem = Union[asyncpraw.models.Submission, asyncpraw.models.Comment, asyncpraw.models.ModAction, str]
 
-class RedditItemStash(collections.abc.Mapping, Mapping[str, Union[BoundedList, BoundedDict]]):
-    __slots__ = ("__dict__", "name", "constructor", "bound")
 
-    name: str
-    constructor: Union[Type[BoundedList], Type[BoundedDict]]
-    bound: int
+class RedditItemStash(collections.abc.Mapping, Mapping[str, "collections.OrderedDict[str, Any]"]):
+    """Remembers the most recently seen items of every subreddit, keyed by fullname.
 
-    @property
-    def count(self) -> int:
-        count = 0
-        for val in vars(self).values():
-            count += len(val)
-        return count
+    Each subreddit keeps an ordered hash map of at most ``bound`` items in least recently used order, so adding, checking and evicting are
+    all O(1). With ``itemtype=BoundedDict``, a second value is stored with each item and :meth:`check` only succeeds if it matches, which
+    makes an item count as new again when e.g. its report count changes."""
+    __slots__ = ("name", "constructor", "bound", "containers", "index")
 
     def __init__(self, name: Optional[str] = None, itemtype: Union[Type[BoundedList], Type[BoundedDict]] = BoundedList, bound: int = 10):
         self.name = name or "Unnamed"
         self.constructor = itemtype
         self.bound = bound
+        self.containers: Dict[str, "collections.OrderedDict[str, Any]"] = {}
+        self.index: Dict[str, str] = {}  # Item key -> subreddit name, for items checked without a known subreddit
+
+    @property
+    def count(self) -> int:
+        return len(self.index)
 
     def __repr__(self) -> str:
         return f"<Stash name={repr(self.name)} constructor={self.constructor.__name__} subreddits={len(self)} total_items={self.count}>"
 
-    def __getitem__(self, k: str) -> Union[BoundedList, BoundedDict]:
-        return getattr(self, k)
+    def __getitem__(self, k: str) -> "collections.OrderedDict[str, Any]":
+        return self.containers[k]
 
     def __len__(self) -> int:
-        return len(vars(self))
+        return len(self.containers)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.containers)
 
-    def __iter__(self) -> Iterator[Tuple[str, Union[BoundedList, BoundedDict]]]:
-        return iter(vars(self).items())
+    def setdefault(self, subreddit_name: str) -> "collections.OrderedDict[str, Any]":
+        if (container := self.containers.get(subreddit_name)) is None:
+            container = self.containers[subreddit_name] = collections.OrderedDict()
+        return container
 
-    def setdefault(self, subreddit_name: str) -> Union[BoundedDict, BoundedList]:
-        if not hasattr(self, subreddit_name):
-            setattr(self, subreddit_name, self.constructor(bound=self.bound))
-        return getattr(self, subreddit_name)
+    @staticmethod
+    def key(item: RedditItem) -> str:
+        if isinstance(item, str):
+            return item
+        return getattr(item, "fullname", None) or str(item.id)
 
-    def add(self, item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment, asyncpraw.models.ModAction], item_second: Optional[Any] = None):
-        subreddit = str(item.subreddit) if hasattr(item, "subreddit") else "all"
-        if subreddit == "all" and hasattr(item, "subreddit_name_prefixed"):
-            subreddit = item.subreddit_name_prefixed
+    @staticmethod
+    def subreddit_name(item: RedditItem) -> Optional[str]:
+        if hasattr(item, "subreddit"):
+            return str(item.subreddit)
+        return getattr(item, "subreddit_name_prefixed", None)
+
+    def add(self, item: RedditItem, item_second: Optional[Any] = None):
+        key = self.key(item)
+        subreddit = self.subreddit_name(item) or "all"
+        if (previous := self.index.get(key)) is not None and previous != subreddit:
+            del self.containers[previous][key]
         container = self.setdefault(subreddit)
-        if isinstance(container, BoundedList):
-            return container.append(item)
-        else:
-            container[item] = item_second
-
-    def check(self, item: Union[asyncpraw.models.Submission, asyncpraw.models.Comment, asyncpraw.models.ModAction],
-              item_second: Optional[Any] = None, _subreddit_name: Optional[str] = None) -> bool:
-        """Check if the object is in any of the instance's lists/dictionaries."""
-        if hasattr(item, "subreddit") or _subreddit_name:
-            if _subreddit_name:
-                subreddit_name = _subreddit_name
-            else:
-                subreddit_name = str(item.subreddit)
-            if value := getattr(self, subreddit_name, None):
-                if isinstance(value, BoundedDict):
-                    if item not in value:
-                        return False
-                    else:
-                        return value[item] == item_second
-                else:
-                    return item in value
-            else:
-                return False
-        elif hasattr(item, "subreddit_name_prefixed"):
-            return self.check(item, item_second=item_second, _subreddit_name=_subreddit_name)
-        else:  # Fallback, search all subreddits
-            for container in vars(self).values():
-                if isinstance(container, BoundedDict):
-                    if item not in container:
-                        return False
-                    else:
-                        return container[item] == item_second
-                else:
-                    if item in container:
-                        return True
-            return False  # Not in any containers
+        container[key] = item_second
+        container.move_to_end(key)
+        self.index[key] = subreddit
+        if len(container) > self.bound:
+            evicted, _ = container.popitem(last=False)
+            del self.index[evicted]
+
+    def check(self, item: RedditItem, item_second: Optional[Any] = None, _subreddit_name: Optional[str] = None) -> bool:
+        """Check if the object is in any of the instance's containers."""
+        key = self.key(item)
+        subreddit = _subreddit_name or self.subreddit_name(item) or self.index.get(key)
+        if (container := self.containers.get(subreddit)) is None or key not in container:
+            return False
+        container.move_to_end(key)
+        if self.constructor is BoundedDict:
+            return container[key] == item_second
+        return True
+
+
+class _BenchmarkItem:
+    __slots__ = ("fullname", "subreddit")
+
+    def __init__(self, num: int, subreddit: str):
+        self.fullname = f"t3_{num:x}"
+        self.subreddit = subreddit
+
+
+def benchmark(bounds=(10, 100, 1000, 10000), subreddits: int = 10, number: int = 100000):
+    """Time add and check at growing bounds. Both should stay flat, since neither depends on the number of stored items."""
+    for bound in bounds:
+        stash = RedditItemStash("benchmark", itemtype=BoundedDict, bound=bound)
+        items = [_BenchmarkItem(num, f"subreddit{num % subreddits}") for num in range(bound * subreddits * 2)]
+        for item in items[:bound * subreddits]:
+            stash.add(item, 0)
+        adds = itertools.cycle(items[bound * subreddits:])
+        checks = itertools.cycle(items)
+        add_time = timeit.timeit(lambda: stash.add(next(adds), 0), number=number)
+        check_time = timeit.timeit(lambda: stash.check(next(checks), 0), number=number)
+        print(f"bound={bound:>6}: add {add_time / number * 1e9:8.0f} ns/op, check {check_time / number * 1e9:8.0f} ns/op, "
+              f"{stash.count} items stored")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshingCache:
+    """Caches the result of an async loader per key. Entries older than ``ttl`` seconds are still returned, but are reloaded in the
+    background, so only the very first use of a key waits for the loader. Concurrent loads of the same key share a single loader call."""
+
+    def __init__(self, loader: Callable[[Hashable], Awaitable[Any]], ttl: float = 3600):
+        self.loader = loader
+        self.ttl = ttl
+        self.data: Dict[Hashable, Tuple[float, Any]] = {}  # Key -> (time loaded, value)
+        self.pending: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable) -> Any:
+        if (entry := self.data.get(key)) is None:
+            self.misses += 1
+            return await self.load(key)
+        self.hits += 1
+        loaded, value = entry
+        if loaded + self.ttl < time.monotonic():
+            self.refresh(key)
+        return value
+
+    async def load(self, key: Hashable) -> Any:
+        """Load the key, waiting for a load that is already running instead of starting another one."""
+        return await asyncio.shield(self.refresh(key))
+
+    def refresh(self, key: Hashable) -> asyncio.Future:
+        if (future := self.pending.get(key)) is None:
+            future = self.pending[key] = asyncio.ensure_future(self.run_loader(key))
+            future.add_done_callback(lambda done: self.loaded(key, done))
+        return future
+
+    def warm(self, key: Hashable):
+        if key not in self.data:
+            self.refresh(key)
+
+    async def run_loader(self, key: Hashable) -> Any:
+        task = asyncio.current_task()
+        value = await self.loader(key)
+        if self.pending.get(key) is task:  # Otherwise the key was invalidated while loading, and the value may be stale
+            self.data[key] = (time.monotonic(), value)
+        return value
+
+    def loaded(self, key: Hashable, future: asyncio.Future):
+        if self.pending.get(key) is future:
+            del self.pending[key]
+        if not future.cancelled() and (exc := future.exception()) is not None:
+            logger.warning("Unable to load %s", key, exc_info=exc)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop the key, or every key if not provided, so that the next use waits for a fresh load. Loads that are already running are
+        detached: their waiters still get their result, but it is not cached."""
+        if key is None:
+            self.data.clear()
+            self.pending.clear()
+        else:
+            self.data.pop(key, None)
+            self.pending.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return "<{} ttl={} size={} pending={} hits={} misses={}>".format(type(self).__name__, self.ttl, len(self.data), len(self.pending),
+                                                                        self.hits, self.misses)
@@ -0,0 +1,42 @@
+from typing import List, Optional, Sequence, Tuple
+
+
+class TimingHistogram:
+    """A fixed-bucket histogram of durations, in seconds."""
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets or self.BUCKETS))
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def observe(self, seconds: float):
+        for num, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[num] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def items(self) -> List[Tuple[str, int]]:
+        labels = [f"<= {bound * 1000:g} ms" for bound in self.buckets] + [f"> {self.buckets[-1] * 1000:g} ms"]
+        return list(zip(labels, self.counts))
+
+    def render(self) -> str:
+        lines = [f"Calls: {self.count}", f"Mean: {self.mean * 1000:.2f} ms", f"Max: {self.max * 1000:.2f} ms"]
+        lines.extend(f"{label}: {count}" for label, count in self.items() if count)
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} count={self.count} mean={self.mean:.4f} max={self.max:.4f}>"
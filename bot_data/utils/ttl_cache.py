@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """A mapping that keeps each item for at most ``ttl`` seconds and at most ``bound`` items in total, evicting the least recently used item
+    when it is full."""
+
+    def __init__(self, bound: int = 100, ttl: float = 300):
+        self.bound = bound
+        self.ttl = ttl
+        self.data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            expires, value = self.data[key]
+        except KeyError:
+            return default
+        if expires < time.monotonic():
+            del self.data[key]
+            return default
+        self.data.move_to_end(key)
+        return value
+
+    def __getitem__(self, key: Hashable) -> Any:
+        if (value := self.get(key, _MISSING)) is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.data[key] = (time.monotonic() + self.ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.bound:
+            self.data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        expires, value = self.data.pop(key, (0, default))
+        return value
+
+    def clear(self):
+        self.data.clear()
+
+    def __repr__(self) -> str:
+        return "<{} bound={} ttl={} size={}>".format(type(self).__name__, self.bound, self.ttl, len(self.data))
+
+    __slots__ = ("bound", "ttl", "data")
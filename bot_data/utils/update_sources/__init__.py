@@ -0,0 +1,4 @@
+from .base import NonOKStatus, Release, SeriesInfo, UpdateSource
+from .guyamoe import GuyamoeSource
+from .mangadex import MangaDexSource
+from .nyaasi import NyaasiSource
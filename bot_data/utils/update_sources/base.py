@@ -0,0 +1,111 @@
+import abc
+import logging
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Pattern, TYPE_CHECKING, Tuple
+
+import aiohttp
+import discord
+
+from ...const import bot_version
+
+if TYPE_CHECKING:
+    from ..worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class NonOKStatus(Exception):
+    """Exception when a request to an update source returns a non-200 status code."""
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"{url} returned status code {status}")
+        self.url = url
+        self.status = status
+
+
+class Release(NamedTuple):
+    label: str
+    link: str
+
+
+class SeriesInfo(NamedTuple):
+    key: str
+    name: str
+    description: Optional[str]
+    image_url: Optional[str]
+    fields: List[Tuple[str, str]]
+    releases: List[str]
+
+
+class UpdateSource(abc.ABC):
+    """A service that the Updates cog polls for new chapters or episodes.
+
+    Subclasses implement fetching and parsing; diffing against the seen releases and rendering the notification Embed have defaults that can be
+    overridden."""
+    name: str  # Display name, also used as the "Service" Embed field
+    service: str  # Value of the SERVICE column in the SEEN and SUBSCRIPTIONS tables
+    key_label: str
+    kind: str = "Manga"
+    release_kind: str = "Chapter"
+    url_regex: Pattern
+    url_template: str
+    default_base_url: str
+
+    def __init__(self, worker_pool: "WorkerPool", base_url: Optional[str] = None):
+        self.worker_pool = worker_pool
+        self.base_url = (base_url or self.default_base_url).rstrip("/")
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} name={self.name!r} base_url={self.base_url!r}>"
+
+    def match(self, url: str) -> Optional[str]:
+        if match := self.url_regex.match(url):
+            return match.group(1)
+        return None
+
+    @staticmethod
+    async def get_json(session: aiohttp.ClientSession, url: str) -> Any:
+        async with session.get(url) as request:
+            if request.status != 200:
+                raise NonOKStatus(url, request.status)
+            return await request.json()
+
+    @staticmethod
+    async def get_text(session: aiohttp.ClientSession, url: str) -> str:
+        async with session.get(url) as request:
+            if request.status != 200:
+                raise NonOKStatus(url, request.status)
+            return await request.text()
+
+    async def resolve_key(self, session: aiohttp.ClientSession, reference: str) -> str:
+        """Get the subscription key for the reference extracted from a URL."""
+        return reference
+
+    @abc.abstractmethod
+    def link(self, key: str) -> str:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def fetch_info(self, session: aiohttp.ClientSession, reference: str) -> SeriesInfo:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def fetch_releases(self, session: aiohttp.ClientSession, key: str) -> Tuple[Dict[str, Release], bool]:
+        """Get the currently published releases, and whether the series has been completed."""
+        raise NotImplementedError
+
+    @staticmethod
+    def sort_key(release_key: str) -> Any:
+        return release_key
+
+    def diff(self, releases: Dict[str, Release], seen: Iterable[str]) -> List[str]:
+        return sorted(set(releases) - set(seen), key=self.sort_key)
+
+    def release_fields(self, key: str, name: str, release: Release) -> List[Tuple[str, str]]:
+        return [("Service", self.name), (self.kind, name), (self.release_kind, release.label), ("Link", release.link)]
+
+    def render_release(self, key: str, name: str, release: Release) -> discord.Embed:
+        embed = discord.Embed(color=discord.Color.green(), title=f"New {self.release_kind}")
+        embed.set_footer(text=f"PokestarBot Version {bot_version}")
+        for field_name, value in self.release_fields(key, name, release):
+            embed.add_field(name=field_name, value=value)
+        return embed
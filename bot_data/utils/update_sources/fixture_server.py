@@ -0,0 +1,151 @@
+"""A local aiohttp server that serves synthetic Guya.moe, MangaDex and nyaa.si data, so that polling throughput and correctness of the update
+sources can be benchmarked offline.
+
+Run ``python -m bot_data.utils.update_sources.fixture_server --series 5000`` to benchmark every source against thousands of synthetic series."""
+import argparse
+import asyncio
+import html
+import logging
+import time
+from typing import Dict, List, Optional, Type
+
+import aiohttp
+import aiohttp.web
+
+from .base import UpdateSource
+from .guyamoe import GuyamoeSource
+from .mangadex import MangaDexSource
+from .nyaasi import NyaasiSource
+from ..worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class FixtureServer:
+    def __init__(self, series: int = 1000, chapters: int = 20, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.chapters: Dict[int, int] = {num: chapters for num in range(1, series + 1)}
+        self.requests = 0
+        self.runner: Optional[aiohttp.web.AppRunner] = None
+        self.app = aiohttp.web.Application()
+        self.app.add_routes([aiohttp.web.get("/guyamoe/api/series/{slug}/", self.guyamoe),
+                             aiohttp.web.get("/mangadex/api/manga/{manga_id}", self.mangadex),
+                             aiohttp.web.get("/nyaasi/view/{torrent_id}", self.nyaasi_view),
+                             aiohttp.web.get("/nyaasi/", self.nyaasi_rss)])
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def base_url(self, source: Type[UpdateSource]) -> str:
+        return f"{self.url}/{source.service.lower()}"
+
+    def release(self, series_num: int, count: int = 1):
+        """Publish new chapters for a synthetic series."""
+        self.chapters[series_num] += count
+
+    def get_series(self, request: aiohttp.web.Request, name: str) -> int:
+        self.requests += 1
+        num = int(request.match_info[name].rpartition("-")[2])
+        if num not in self.chapters:
+            raise aiohttp.web.HTTPNotFound()
+        return num
+
+    async def guyamoe(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        num = self.get_series(request, "slug")
+        return aiohttp.web.json_response(
+            {"title": f"Series {num}", "description": f"Synthetic series {num}", "author": "Author", "artist": "Artist", "cover": f"/{num}.jpg",
+             "next_release_time": time.time() + 86400, "chapters": {str(chap): {} for chap in range(1, self.chapters[num] + 1)}})
+
+    async def mangadex(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        num = self.get_series(request, "manga_id")
+        return aiohttp.web.json_response(
+            {"manga"  : {"status": 2, "description": f"[b]Synthetic[/b] series {num}", "author": "Author", "artist": "Artist", "alt_names": [],
+                         "hentai": 0, "rating": {"bayesian": 9.0}, "title": f"Series {num}", "cover_url": f"/{num}.jpg", "last_chapter": "0"},
+             "chapter": {str(num * 10000 + chap): {"chapter": str(chap), "title": f"Chapter {chap}", "lang_code": "gb"} for chap in
+                         range(self.chapters[num], 0, -1)}})
+
+    async def nyaasi_view(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        num = self.get_series(request, "torrent_id")
+        return aiohttp.web.Response(text=f"<html><body><div class=\"panel-title\">[HorribleSubs] Series {num} - 01 [1080p].mkv</div></body></html>",
+                                    content_type="text/html")
+
+    async def nyaasi_rss(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        self.requests += 1
+        num = int(request.query["q"].replace("+", " ").rpartition(" ")[2])
+        items = "".join(f"<item><title>{html.escape(f'[HorribleSubs] Series {num} - {ep:02} [1080p].mkv')}</title>"
+                        f"<link>{self.url}/download/{num}/{ep}.torrent</link></item>" for ep in range(1, self.chapters[num] + 1))
+        return aiohttp.web.Response(text=f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>Series {num}</title>{items}</channel></rss>",
+                                    content_type="application/rss+xml")
+
+    async def start(self) -> str:
+        self.runner = aiohttp.web.AppRunner(self.app)
+        await self.runner.setup()
+        site = aiohttp.web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.url
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def __aenter__(self) -> "FixtureServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+async def poll(source: UpdateSource, session: aiohttp.ClientSession, keys: List[str], seen: Dict[str, List[str]], concurrency: int) -> Dict[
+    str, List[str]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def poll_one(key: str):
+        async with semaphore:
+            releases, _completed = await source.fetch_releases(session, key)
+            return key, source.diff(releases, seen.get(key, []))
+
+    return dict(await asyncio.gather(*[poll_one(key) for key in keys]))
+
+
+async def benchmark(series: int = 1000, chapters: int = 20, concurrency: int = 50, updated: int = 100):
+    worker_pool = WorkerPool()
+    async with FixtureServer(series=series, chapters=chapters) as server, aiohttp.ClientSession() as session:
+        for source_cls in (GuyamoeSource, MangaDexSource, NyaasiSource):
+            source = source_cls(worker_pool, base_url=server.base_url(source_cls))
+            keys = [await source.resolve_key(session, str(num)) if source_cls is NyaasiSource else str(num) for num in server.chapters]
+            server.requests = 0
+            start = time.perf_counter()
+            first = await poll(source, session, keys, {}, concurrency)
+            elapsed, requests = time.perf_counter() - start, server.requests
+            for num in list(server.chapters)[:updated]:
+                server.release(num)
+            server.requests = 0
+            start = time.perf_counter()
+            second = await poll(source, session, keys, first, concurrency)
+            second_elapsed, second_requests = time.perf_counter() - start, server.requests
+            changed = sorted(key for key, new in second.items() if new)
+            correct = len(changed) == min(updated, series) and all(len(second[key]) == 1 for key in changed)
+            print(f"{source.name}: first poll of {len(keys)} series ({requests} requests) in {elapsed:.2f}s ({len(keys) / elapsed:.0f} series/s), "
+                  f"second poll ({second_requests} requests) in {second_elapsed:.2f}s ({len(keys) / second_elapsed:.0f} series/s), "
+                  f"detected {len(changed)} updated series, correct: {correct}")
+    for name, histogram in sorted(worker_pool.timings.items()):
+        print(f"{name}: {histogram!r}")
+    worker_pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.partition("\n\n")[0])
+    parser.add_argument("--series", type=int, default=1000, help="The number of synthetic series per source.")
+    parser.add_argument("--chapters", type=int, default=20, help="The number of chapters each series starts with.")
+    parser.add_argument("--concurrency", type=int, default=50, help="The maximum number of concurrent requests.")
+    parser.add_argument("--updated", type=int, default=100, help="The number of series that get a new chapter between polls.")
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.series, args.chapters, args.concurrency, args.updated))
+
+
+if __name__ == "__main__":
+    main()
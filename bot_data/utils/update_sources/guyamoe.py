@@ -0,0 +1,52 @@
+import datetime
+from typing import Dict, Tuple
+
+import aiohttp
+import pytz
+
+from .base import Release, SeriesInfo, UpdateSource
+from ...const import guyamoe
+
+NY = pytz.timezone("America/New_York")
+
+
+class GuyamoeSource(UpdateSource):
+    name = "Guya.moe"
+    service = "Guyamoe"
+    key_label = "Slug"
+    url_regex = guyamoe
+    url_template = "https://guya.moe/read/manga/<manga-name>"
+    default_base_url = "https://guya.moe"
+
+    def link(self, key: str) -> str:
+        return f"https://guya.moe/read/manga/{key}"
+
+    @staticmethod
+    def sort_key(release_key: str) -> float:
+        return float(release_key)
+
+    @staticmethod
+    def chapter_label(release_key: str) -> str:
+        num_chap = float(release_key)
+        if int(num_chap) == num_chap:
+            num_chap = int(num_chap)
+        return str(num_chap)
+
+    async def fetch_info(self, session: aiohttp.ClientSession, reference: str) -> SeriesInfo:
+        json = await self.get_json(session, f"{self.base_url}/api/series/{reference}/")
+        next_release = datetime.datetime.utcfromtimestamp(json["next_release_time"]).replace(tzinfo=pytz.UTC).astimezone(NY).strftime(
+            "%A, %B %d, %Y at %I:%M:%S %p")
+        chaps = [str(float(key)) for key in json["chapters"].keys()]
+        latest_chapter = self.chapter_label(max(chaps, key=self.sort_key))
+        fields = [("Link", self.link(reference)), ("Author", json["author"] or "None"), ("Artist", json["artist"] or "None"),
+                  ("Latest Chapter", latest_chapter), ("Next Chapter Published In", next_release)]
+        return SeriesInfo(reference, json["title"], json["description"], self.base_url + json["cover"], fields, chaps)
+
+    async def fetch_releases(self, session: aiohttp.ClientSession, key: str) -> Tuple[Dict[str, Release], bool]:
+        json = await self.get_json(session, f"{self.base_url}/api/series/{key}/")
+        releases = {}
+        for chap in json["chapters"].keys():
+            release_key = str(float(chap))
+            label = self.chapter_label(release_key)
+            releases[release_key] = Release(label, f"https://guya.moe/read/manga/{key}/{label.replace('.', '-')}")
+        return releases, False
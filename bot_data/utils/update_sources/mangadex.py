@@ -0,0 +1,78 @@
+import html
+from typing import Dict, Tuple
+
+import aiohttp
+import bbcode
+
+from .base import Release, SeriesInfo, UpdateSource
+from ...const import mangadex
+
+
+class MangaDexSource(UpdateSource):
+    name = "MangaDex"
+    service = "MangaDex"
+    key_label = "Manga ID"
+    url_regex = mangadex
+    url_template = "https://mangadex.org/title/<manga-id>"
+    default_base_url = "https://mangadex.org"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.parser = self.set_up_parser()
+
+    @staticmethod
+    def render_url(name, value, options, parent, context):
+        if options and "url" in options:
+            href = options["url"]
+        else:
+            href = value
+        return "[{text}]({href})".format(href=href, text=html.unescape(value))
+
+    def set_up_parser(self):
+        parser = bbcode.Parser(newline="\n", install_defaults=False, escape_html=False, url_template="[{text}]({href})", replace_cosmetic=False)
+        parser.add_simple_formatter("b", "**%(value)s**", render_embedded=True)
+        parser.add_simple_formatter("i", "*%(value)s*", render_embedded=True)
+        parser.add_simple_formatter("u", "__%(value)s__", render_embedded=True)
+        parser.add_simple_formatter("hr", "\n\n", standalone=True, render_embedded=False)
+        parser.add_simple_formatter("spoiler", "||%(value)s||")
+        parser.add_simple_formatter("*", "", standalone=True)
+        parser.add_simple_formatter("img", "")
+        parser.add_simple_formatter("quote", "```\n%(value)s\n```")
+        parser.add_simple_formatter("code", "`%(value)s`")
+        parser.add_formatter("url", self.render_url, replace_links=False, replace_cosmetic=False)
+        return parser
+
+    def link(self, key: str) -> str:
+        return f"https://mangadex.org/title/{key}"
+
+    @staticmethod
+    def english_chapters(json: dict) -> Dict[str, str]:
+        processed_chapters = {}
+        for chap_key, chapter_data in json["chapter"].items():
+            chap = chapter_data["chapter"] + ": " + chapter_data["title"]
+            if chapter_data["lang_code"] == "gb" and chap not in processed_chapters:
+                processed_chapters[chap] = chap_key
+        return processed_chapters
+
+    async def fetch_info(self, session: aiohttp.ClientSession, reference: str) -> SeriesInfo:
+        json = await self.get_json(session, f"{self.base_url}/api/manga/{reference}")
+        manga = json["manga"]
+        description = await self.worker_pool.run("mangadex_bbcode", self.parser.format, html.unescape(manga["description"]))
+        if len(description) > 2048:
+            description = description[:2045] + "..."
+        processed_chapters = list(self.english_chapters(json))
+        latest_chapter = processed_chapters[0] if processed_chapters else None
+        fields = [("Link", self.link(reference)), ("Completed", str(manga["status"] == 1)), ("Author", html.unescape(manga["author"]) or "None"),
+                  ("Artist", html.unescape(manga["artist"]) or "None"),
+                  ("Alternate Names", "\n".join(html.unescape(name) for name in manga["alt_names"]) or "None"),
+                  ("R18", str(bool(manga["hentai"]))), ("Rating", str(manga["rating"]["bayesian"])), ("Latest Chapter", str(latest_chapter))]
+        return SeriesInfo(reference, html.unescape(manga["title"]), description, f"https://www.mangadex.org{manga['cover_url']}", fields,
+                          processed_chapters)
+
+    async def fetch_releases(self, session: aiohttp.ClientSession, key: str) -> Tuple[Dict[str, Release], bool]:
+        json = await self.get_json(session, f"{self.base_url}/api/manga/{key}")
+        processed_chapters = self.english_chapters(json)
+        nums = [chap.partition(":")[0] for chap in processed_chapters]
+        completed = json["manga"]["last_chapter"] in nums and str(json["manga"]["last_chapter"]) != "0"
+        releases = {chap: Release(chap, f"https://mangadex.org/chapter/{chap_id}/") for chap, chap_id in processed_chapters.items()}
+        return releases, completed
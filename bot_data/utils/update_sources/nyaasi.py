@@ -0,0 +1,67 @@
+from typing import Dict, List, Tuple
+
+import aiohttp
+import bs4
+import feedparser
+
+from .base import Release, SeriesInfo, UpdateSource
+from ...const import horriblesubs, nyaasi
+
+
+class NyaasiSource(UpdateSource):
+    name = "Nyaa.si"
+    service = "Nyaasi"
+    key_label = "Anime Name"
+    kind = "Anime"
+    release_kind = "Episode"
+    url_regex = nyaasi
+    url_template = "https://nyaa.si/view/<torrent-id>"
+    default_base_url = "https://nyaa.si"
+    HORRIBLESUBS_TORRENT = horriblesubs
+
+    @classmethod
+    def parse_anime_name(cls, text: str) -> str:
+        soup = bs4.BeautifulSoup(text, features="lxml")
+        full_title = next(filter(lambda tag: cls.HORRIBLESUBS_TORRENT.search(tag.text), soup.find_all(class_="panel-title")), None)
+        if full_title is None:
+            raise ValueError("The page is not a HorribleSubs torrent.")
+        return cls.HORRIBLESUBS_TORRENT.search(full_title.text).group(1)
+
+    def link(self, key: str) -> str:
+        return f"https://nyaa.si/user/HorribleSubs?q={key.replace(' ', '+')}&c=0_0&f=0"
+
+    def rss_link(self, key: str) -> str:
+        return f"{self.base_url}/?page=rss&q={key.replace(' ', '+')}&c=0_0&f=0&u=HorribleSubs"
+
+    @staticmethod
+    def sort_key(release_key: str) -> int:
+        return int(release_key)
+
+    async def resolve_key(self, session: aiohttp.ClientSession, reference: str) -> str:
+        text = await self.get_text(session, f"{self.base_url}/view/{reference}")
+        return await self.worker_pool.run("nyaasi_page", self.parse_anime_name, text)
+
+    async def fetch_entries(self, session: aiohttp.ClientSession, key: str) -> List[dict]:
+        text = await self.get_text(session, self.rss_link(key))
+        data = await self.worker_pool.run("nyaasi_rss", feedparser.parse, text)
+        return data["entries"]
+
+    async def fetch_info(self, session: aiohttp.ClientSession, reference: str) -> SeriesInfo:
+        anime_name = await self.resolve_key(session, reference)
+        entries = await self.fetch_entries(session, anime_name)
+        episodes = {int(self.HORRIBLESUBS_TORRENT.search(entry["title"]).group(2)) for entry in entries}
+        fields = [("Initial Torrent Link (for adding)", f"https://nyaa.si/view/{reference}"), ("Latest Episode", str(max(episodes)))]
+        return SeriesInfo(anime_name, anime_name, None, None, fields, [str(episode) for episode in episodes])
+
+    async def fetch_releases(self, session: aiohttp.ClientSession, key: str) -> Tuple[Dict[str, Release], bool]:
+        releases = {}
+        for entry in await self.fetch_entries(session, key):
+            search = self.HORRIBLESUBS_TORRENT.search(entry["title"])
+            number, resolution = search.group(2, 3)
+            if int(resolution) != 1080:
+                continue
+            releases[str(int(number))] = Release(str(int(number)), entry["link"])
+        return releases, False
+
+    def release_fields(self, key: str, name: str, release: Release) -> List[Tuple[str, str]]:
+        return [("Service", self.name), (self.kind, name), ("Episode #", release.label), ("Link", release.link), ("Search Page", self.link(key))]
@@ -0,0 +1,42 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from .timing_histogram import TimingHistogram
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+def _timed(func: Callable[..., _T], *args, **kwargs) -> Tuple[_T, float]:
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except StopIteration as exc:  # A future cannot be resolved with StopIteration, which would leave the caller waiting forever
+        raise RuntimeError(f"{getattr(func, '__qualname__', func)} raised StopIteration") from exc
+    return result, time.perf_counter() - start
+
+
+class WorkerPool:
+    """Runs synchronous, CPU-heavy calls (HTML/RSS/BBCode parsing) off of the event loop."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PokestarBot-Worker")
+        self.timings: Dict[str, TimingHistogram] = {}
+
+    async def run(self, name: str, func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        loop = asyncio.get_running_loop()
+        result, elapsed = await loop.run_in_executor(self.executor, functools.partial(_timed, func, *args, **kwargs))
+        self.timings.setdefault(name, TimingHistogram()).observe(elapsed)
+        logger.debug("Worker call %s took %.4f seconds", name, elapsed)
+        return result
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} workers={self.executor._max_workers} names={list(self.timings)}>"